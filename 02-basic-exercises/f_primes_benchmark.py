@@ -0,0 +1,133 @@
+# Benchmark every prime numbers function in f_primes.py over a range of limits
+# python f_primes_benchmark.py --max-limit 1000000 --output results.json
+# python f_primes_benchmark.py --max-limit 1000000 --baseline results.json  (fails if anything got slower)
+import argparse
+import csv
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import f_primes
+
+# name -> (function(limit) that finds the primes below limit, the biggest limit worth waiting for)
+# A list of every prime below 10 ** 9 is already ~2 GB of Python ints, so the generators are consumed without
+# keeping the primes, and above 10 ** 9 only the count is measured
+ALGORITHMS = {
+    "simple": (f_primes.prime_numbers_simple, 20_000),
+    "div_2": (f_primes.prime_numbers_div_2, 30_000),
+    "root": (f_primes.prime_numbers_root, 1_000_000),
+    "sieve": (f_primes.prime_numbers_sieve, 10**8),
+    "cached": (f_primes.primes_cached, 10**8),
+    "segmented": (lambda limit: sum(1 for _ in f_primes.iter_primes(limit)), 10**9),
+    # The shared memory takes 1 byte per odd number, 500 MB at 10 ** 9
+    "parallel": (lambda limit: sum(1 for _ in f_primes.iter_primes_parallel(0, limit)), 10**9),
+    "parallel_count": (lambda limit: f_primes.count_primes_range(0, limit), 10**10),
+    "miller_rabin": (lambda limit: [n for n in range(limit) if f_primes.is_prime(n)], 10**7),
+}
+
+
+def log_scale(min_limit, max_limit, points_per_decade):
+    limits = []
+    limit = float(min_limit)
+    while round(limit) <= max_limit:
+        limits.append(round(limit))
+        limit *= 10 ** (1 / points_per_decade)
+    return limits
+
+
+def measure(function, limit, repeats, warmups):
+    for _ in range(warmups):
+        function(limit)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(limit)
+        times.append(time.perf_counter() - start)
+    # Memory is measured in a separate run, tracemalloc slows everything down and would skew the times
+    # (only this process is traced, memory used by worker processes isn't included)
+    tracemalloc.start()
+    function(limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "peak_memory": peak,
+    }
+
+
+def run(names, limits, repeats, warmups):
+    results = []
+    for name in names:
+        function, max_limit = ALGORITHMS[name]
+        for limit in limits:
+            if limit > max_limit:
+                continue
+            result = {"function": name, "limit": limit, "repeats": repeats, **measure(function, limit, repeats, warmups)}
+            print(f"{name:<14}{limit:>14,}{result['median']:>12.4f}s{result['peak_memory'] / 2**20:>10.1f} MB")
+            results.append(result)
+    return results
+
+
+def save(results, path):
+    path = Path(path)
+    if path.suffix == ".csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        path.write_text(json.dumps(results, indent=2))
+
+
+def load(path):
+    path = Path(path)
+    if path.suffix == ".csv":
+        with open(path, newline="") as f:
+            return [{**row, "limit": int(row["limit"]), "median": float(row["median"])} for row in csv.DictReader(f)]
+    return json.loads(path.read_text())
+
+
+def compare(results, baseline, tolerance, min_difference=0.001):
+    # Returns the results that are slower than the baseline by more than `tolerance` (0.2 = 20%)
+    # Differences below `min_difference` seconds are noise, not regressions
+    baseline_times = {(row["function"], row["limit"]): row["median"] for row in baseline}
+    regressions = []
+    for result in results:
+        old = baseline_times.get((result["function"], result["limit"]))
+        if old is None:
+            continue
+        if result["median"] > old * (1 + tolerance) and result["median"] - old > min_difference:
+            regressions.append((result, old))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prime numbers functions")
+    parser.add_argument("--functions", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--min-limit", type=int, default=1000)
+    parser.add_argument("--max-limit", type=int, default=1_000_000)
+    parser.add_argument("--points-per-decade", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmups", type=int, default=1)
+    parser.add_argument("--output", help="Save the results to a .json or .csv file")
+    parser.add_argument("--baseline", help="Compare with the results of an earlier run (.json or .csv)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--min-difference", type=float, default=0.001, help="Ignore slowdowns below this (seconds)")
+    args = parser.parse_args()
+
+    limits = log_scale(args.min_limit, args.max_limit, args.points_per_decade)
+    results = run(args.functions, limits, args.repeats, args.warmups)
+    if args.output:
+        save(results, args.output)
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.tolerance, args.min_difference)
+        for result, old in regressions:
+            print(f"REGRESSION: {result['function']} at {result['limit']:,}: {old:.4f}s -> {result['median']:.4f}s")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
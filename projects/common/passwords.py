@@ -0,0 +1,149 @@
+# Password hashing and login rate limiting, shared by every project (flask-website, fullstack-demo, sales-website)
+# Each project imports it through its own passwords.py, which adds the projects folder to sys.path
+# Benchmark every cost setting: python common/passwords.py
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# name -> (algorithm, parameters). Higher costs are slower for attackers, and for every login
+# scrypt also needs 128 * n * r bytes of memory per hash, which is what makes it expensive on GPUs
+COSTS = {
+    "low": ("scrypt", {"n": 2**12, "r": 8, "p": 1}),
+    "default": ("scrypt", {"n": 2**14, "r": 8, "p": 1}),
+    "high": ("scrypt", {"n": 2**15, "r": 8, "p": 1}),
+    "pbkdf2": ("pbkdf2_sha256", {"iterations": 600_000}),
+}
+COST = os.environ.get("PASSWORD_COST", "default")  # Changing it rehashes every password on its next login
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(algorithm, params, password, salt):
+    if algorithm == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * r * (n + p), dklen=32)
+    if algorithm == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params["iterations"], dklen=32)
+    raise ValueError(f"Unknown password hash algorithm {algorithm}")
+
+
+def hash_password(password, cost=None):
+    # "scrypt$n=16384,r=8,p=1$<salt>$<hash>" - the parameters are stored with the hash, so old hashes still work
+    algorithm, params = COSTS[cost or COST]
+    salt = secrets.token_bytes(16)
+    settings = ",".join(f"{key}={value}" for key, value in params.items())
+    return f"{algorithm}${settings}${_b64(salt)}${_b64(_derive(algorithm, params, password, salt))}"
+
+
+def _parse(stored):
+    algorithm, settings, salt, digest = stored.split("$")
+    params = {key: int(value) for key, value in (item.split("=") for item in settings.split(","))}
+    return algorithm, params, _unb64(salt), _unb64(digest)
+
+
+def is_password_hash(stored):
+    # True for anything hash_password returns (any cost), False for an old plain text password
+    return stored.startswith(tuple(f"{algorithm}$" for algorithm, _ in COSTS.values()))
+
+
+def verify_password(password, stored, cost=None):
+    # Returns (is the password right, a new hash to save or None)
+    # A new hash is returned for plain text passwords (from before hashing) and for hashes of another cost
+    # stored=None (no such user) still spends the time of a real check, so response times don't reveal usernames
+    algorithm, params = COSTS[cost or COST]
+    if stored is None:
+        _derive(algorithm, params, password, bytes(16))  # The same work as a real check, the result doesn't matter
+        return False, None
+    if not is_password_hash(stored):
+        # An old plain text password - check it once, and replace it with a hash
+        ok = hmac.compare_digest(stored.encode(), password.encode())
+        return ok, hash_password(password, cost) if ok else None
+    stored_algorithm, stored_params, salt, digest = _parse(stored)
+    ok = hmac.compare_digest(_derive(stored_algorithm, stored_params, password, salt), digest)
+    if ok and (stored_algorithm, stored_params) != (algorithm, params):
+        return ok, hash_password(password, cost)
+    return ok, None
+
+
+class TokenBucket:
+    # Every key (an IP, a username...) gets `burst` tokens, refilled at `rate` tokens per second
+    # A request takes a token, and is refused when there are none left
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # key -> (tokens, last update)
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > 100_000:
+                self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        # Full buckets are the same as missing ones, drop them
+        full_after = self.burst / self.rate
+        self._buckets = {key: value for key, value in self._buckets.items() if now - value[1] < full_after}
+
+
+class LoginRateLimiter:
+    # Checked before the (expensive on purpose) password hash, so logins can't be used to burn the server's CPU
+    # Per IP: stops a single client. Per username: stops guessing one account's password from many IPs
+    # LOGIN_RATE_LIMIT=off turns it off (for load tests, where all the clients share one IP)
+    def __init__(self, ip_rate=1, ip_burst=20, username_rate=0.1, username_burst=5):
+        self.enabled = os.environ.get("LOGIN_RATE_LIMIT", "on") != "off"
+        self.ips = TokenBucket(ip_rate, ip_burst)
+        self.usernames = TokenBucket(username_rate, username_burst)
+
+    def allow(self, ip, username):
+        if not self.enabled:
+            return True
+        return self.ips.allow(ip) and self.usernames.allow(username)
+
+
+def benchmark(seconds=2, threads=1):
+    # Logins per second at every cost setting (verify + nothing else, so this is the upper limit for the app)
+    results = {}
+    for name in COSTS:
+        stored = hash_password("correct horse battery staple", name)
+        verify_password("correct horse battery staple", stored, name)  # Warm up
+
+        def worker():
+            count = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                verify_password("correct horse battery staple", stored, name)
+                count += 1
+            return count
+
+        with ThreadPoolExecutor(threads) as executor:  # hashlib releases the GIL while hashing
+            counts = list(executor.map(lambda _: worker(), range(threads)))
+        results[name] = sum(counts) / seconds
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password hashing speed at every cost setting")
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+    for name, per_second in benchmark(args.seconds, args.threads).items():
+        algorithm, params = COSTS[name]
+        print(f"{name:<10}{algorithm:<16}{str(params):<32}{per_second:>10.1f} logins/sec")
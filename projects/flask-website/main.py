@@ -1,11 +1,13 @@
 from flask import Flask, render_template, request, redirect, session
 from views import auth
 from db import close_db
+from sql_registry import queries
 
 app = Flask(__name__)
 app.register_blueprint(auth.bp)
 app.secret_key = "super duper top secret key"
 app.teardown_appcontext(close_db)
+queries.init_app(app)  # Reads and checks all the sql/*.sql files once
 
 @app.route("/")
 @app.route("/home")
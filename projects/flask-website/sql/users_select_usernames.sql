@@ -0,0 +1,11 @@
+SELECT
+    username
+FROM
+    users
+WHERE
+    username IN (
+        SELECT
+            value
+        FROM
+            json_each(?)
+    )
\ No newline at end of file
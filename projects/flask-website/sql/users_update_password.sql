@@ -0,0 +1,6 @@
+UPDATE
+    users
+SET
+    password = ?
+WHERE
+    username = ?
\ No newline at end of file
@@ -0,0 +1,70 @@
+import sqlite3
+from pathlib import Path
+from flask import current_app
+
+
+CURRENT_FILE = Path(__file__)
+SQL_FOLDER = CURRENT_FILE.parent / "sql"
+
+
+class SQLRegistry:
+    # Reads every .sql file once and keeps its text in memory: queries["users_insert"] -> "INSERT INTO users ..."
+    # Every statement is also checked against the schema when it's loaded, so a broken file fails at startup
+    # instead of on the first request that uses it. In debug mode changed files are reloaded (hot reload)
+    def __init__(self, folder=SQL_FOLDER, schema="setup_db"):
+        self.folder = Path(folder)
+        self.schema = schema  # The script that creates the tables, the other files are checked against it
+        self.reload = None  # None = only in debug mode
+        self._statements = {}
+        self._mtimes = {}
+
+    def init_app(self, app):
+        self.load()
+        app.extensions["sql_registry"] = self
+
+    def load(self):
+        statements = {}
+        mtimes = {}
+        for path in sorted(self.folder.glob("*.sql")):
+            statements[path.stem] = path.read_text()
+            mtimes[path.stem] = path.stat().st_mtime
+        self.validate(statements)
+        self._statements = statements
+        self._mtimes = mtimes
+
+    def validate(self, statements):
+        if self.schema not in statements:
+            raise ValueError(f"Missing the schema file {self.schema}.sql in {self.folder}")
+        db = sqlite3.connect(":memory:")
+        try:
+            db.executescript(statements[self.schema])
+            for name, sql in statements.items():
+                if name == self.schema:
+                    continue
+                try:
+                    db.execute(f"EXPLAIN {sql}")  # Compiles the statement without running it
+                except sqlite3.ProgrammingError as e:
+                    if "bindings" not in str(e):  # It compiled, only the parameters are missing
+                        raise ValueError(f"{name}.sql: {e}") from e
+                except sqlite3.Error as e:
+                    raise ValueError(f"{name}.sql: {e}") from e
+        finally:
+            db.close()
+
+    def _changed(self):
+        for path in self.folder.glob("*.sql"):
+            if self._mtimes.get(path.stem) != path.stat().st_mtime:
+                return True
+        return len(self._mtimes) != len(list(self.folder.glob("*.sql")))
+
+    def __getitem__(self, name):
+        reload = current_app.debug if self.reload is None else self.reload
+        if reload and self._changed():
+            self.load()
+        try:
+            return self._statements[name]
+        except KeyError:
+            raise KeyError(f"No such SQL file: {self.folder / name}.sql") from None
+
+
+queries = SQLRegistry()
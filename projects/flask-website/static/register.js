@@ -45,7 +45,7 @@ function checkPasswordsMatch() {
 }
 
 async function checkUsernameExistsAsync() {
-  let response = await fetch("/auth/user_exists?username=" + username.value);
+  let response = await fetch("/auth/user_exists?username=" + encodeURIComponent(username.value));
   let data = await response.json();
   if (data.user_exists) {
     username.style.backgroundColor = "red";
@@ -59,5 +59,14 @@ async function checkUsernameExistsAsync() {
 }
 
 
+// Check while typing, but only after a short pause (not a request for every key)
+let usernameTimer = null;
+function checkUsernameSoon() {
+  clearTimeout(usernameTimer);
+  usernameTimer = setTimeout(checkUsernameExistsAsync, 300);
+}
+
+
 password2.addEventListener("input", checkPasswordsMatch);
+username.addEventListener("input", checkUsernameSoon);
 username.addEventListener("focusout", checkUsernameExistsAsync);
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import math
+import threading
+from sql_registry import queries
+
+
+class BloomFilter:
+    # A set that only answers "maybe in it" or "definitely not in it", in a fixed and small amount of memory
+    # (about 1.2 bytes per name for 1% false positives, no matter how long the names are)
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))  # In bits
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Two hashes from one digest, combined into as many as needed (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class UsernameIndex:
+    # Answers "is this username taken?" - names that are definitely free are answered from memory,
+    # only the "maybe" answers are checked in the database (so false positives never reach the user)
+    # A user registered by another process isn't in this filter, but the UNIQUE constraint still stops the insert
+    def __init__(self, error_rate=0.01):
+        self.error_rate = error_rate
+        self.filter = None
+        self._lock = threading.Lock()
+        self.memory_answers = 0
+        self.db_answers = 0
+
+    def load(self, db):
+        cursor = db.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users")
+        count = cursor.fetchone()[0]
+        bloom = BloomFilter(max(2 * count, 10_000), self.error_rate)  # Room to grow before false positives go up
+        cursor.execute("SELECT username FROM users")
+        for (username,) in cursor:
+            bloom.add(username)
+        self.filter = bloom
+
+    def add(self, username):
+        with self._lock:
+            if self.filter is not None:
+                self.filter.add(username)
+
+    def taken(self, usernames, get_db):
+        # Returns {username: True / False}, with a single query for all the names that might be taken
+        # get_db is only called if the database is needed, answers from memory don't even open a connection
+        with self._lock:
+            if self.filter is None:
+                self.load(get_db())  # On the first request, so the app can start before the database exists
+            maybe = [username for username in usernames if username in self.filter]
+        self.memory_answers += len(usernames) - len(maybe)
+        result = dict.fromkeys(usernames, False)
+        if maybe:
+            self.db_answers += len(maybe)
+            cursor = get_db().cursor()
+            cursor.execute(queries["users_select_usernames"], [json.dumps(maybe)])
+            for (username,) in cursor:
+                result[username] = True
+        return result
+
+
+usernames = UsernameIndex()
@@ -1,25 +1,26 @@
 import sqlite3
-from flask import Blueprint, flash, redirect, render_template, request, session, current_app
+from flask import Blueprint, flash, redirect, render_template, request, session
 from db import get_db
+from passwords import LoginRateLimiter, hash_password, verify_password
+from sql_registry import queries
+from usernames import usernames
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
+MAX_BATCH = 100
+login_limiter = LoginRateLimiter()
 
 
 @bp.route("user_exists")
 def user_exists():
-    db = get_db()
-    cursor = db.cursor()
+    # /auth/user_exists?username=admin -> {"user_exists": true}
+    # /auth/user_exists?usernames=admin,bob -> {"user_exists": {"admin": true, "bob": false}}
+    if "usernames" in request.args:
+        names = [name for name in request.args["usernames"].split(",") if name][:MAX_BATCH]
+        return {"user_exists": usernames.taken(names, get_db)}
     username = request.args.get("username")
     if not username:
         return {"user_exists": False}
-    with current_app.open_resource("sql/users_select_username.sql", "r") as f:
-        sql = f.read()
-    cursor.execute(sql, [username])
-    db_user = cursor.fetchone()
-    if db_user:
-        return {"user_exists": True}
-    else:
-        return {"user_exists": False}
+    return {"user_exists": usernames.taken([username], get_db)[username]}
 
 
 @bp.route("/register", methods=["GET", "POST"])
@@ -30,14 +31,13 @@ def register():
         form_username = request.form["username"]
         form_password = request.form["password"]
         try:
-            with current_app.open_resource("sql/users_insert.sql", "r") as f:
-                sql = f.read()
-            cursor.execute(sql, [form_username, form_password])
+            cursor.execute(queries["users_insert"], [form_username, hash_password(form_password)])
         except sqlite3.IntegrityError:
             flash("The username you selected already exists", "error")
             return render_template("register.html")
         else:
             db.commit()
+            usernames.add(form_username)
             return redirect("/")
     return render_template("register.html")
 
@@ -49,11 +49,16 @@ def login():
         cursor = db.cursor()
         form_username = request.form["username"]
         form_password = request.form["password"]
-        with current_app.open_resource("sql/users_select_username.sql", "r") as f:
-            sql = f.read()
-        cursor.execute(sql, [form_username])
-        db_user = cursor.fetchone()  # (username, password)
-        if db_user[0] == form_username and db_user[1] == form_password:
+        if not login_limiter.allow(request.remote_addr, form_username):
+            flash("Too many login attempts, please try again later", "error")
+            return render_template("login.html", session=session), 429
+        cursor.execute(queries["users_select_username"], [form_username])
+        db_user = cursor.fetchone()  # (username, password) or None
+        ok, new_hash = verify_password(form_password, db_user[1] if db_user else None)
+        if ok:
+            if new_hash:  # A plain text password from before, or hashed with other settings
+                cursor.execute(queries["users_update_password"], [new_hash, form_username])
+                db.commit()
             session["username"] = form_username
             return redirect("/")
         else:
@@ -0,0 +1,36 @@
+import threading
+import time
+from typing import Any
+
+
+class ProfileCache:
+    """User profiles by user id (the token's "sub"), kept for `ttl` seconds
+
+    The TTL is short, so a change made by another process shows up soon even without `invalidate`
+    """
+
+    def __init__(self, ttl: float = 30, max_items: int = 10_000) -> None:
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items: dict[str, tuple[float, Any]] = {}  # sub -> (expiry time, profile)
+        self._lock = threading.Lock()
+
+    def get(self, sub: str) -> Any | None:
+        item = self._items.get(sub)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, sub: str, profile: Any) -> None:
+        with self._lock:
+            if len(self._items) >= self.max_items:
+                now = time.monotonic()
+                self._items = {key: item for key, item in self._items.items() if item[0] >= now}
+                if len(self._items) >= self.max_items:
+                    self._items.clear()
+            self._items[sub] = (time.monotonic() + self.ttl, profile)
+
+    def invalidate(self, sub: str) -> None:
+        """Call after changing a user"""
+        with self._lock:
+            self._items.pop(sub, None)
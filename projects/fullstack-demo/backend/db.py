@@ -1,5 +1,7 @@
 import sqlite3
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 from flask import g
 
@@ -15,6 +17,19 @@ def get_db() -> sqlite3.Connection:
     return g.db
 
 
+def row_factory_for(cls: Callable[..., Any]) -> Callable[[sqlite3.Cursor, tuple], Any]:
+    """A row_factory that makes a `cls` out of every row: cls(*row)
+
+    The columns must be selected in the order of the arguments (for a dataclass, the order of its fields).
+    No dict or sqlite3.Row per row - the values go straight into the object
+    """
+
+    def factory(_cursor: sqlite3.Cursor, row: tuple) -> Any:
+        return cls(*row)
+
+    return factory
+
+
 def close_db(_e=None) -> None:
     """Close the connection to the SQLite database"""
     db = g.pop("db", None)
@@ -1,60 +1,95 @@
-from dataclasses import asdict
-
+from cache import ProfileCache
 from db import close_db, get_db, init_db
-from flask import Flask, request, session
+from flask import Flask, Response, jsonify, request, session, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, get_jwt, jwt_required
+from models import PublicUser, get_public_user, iter_public_users
+from passwords import LoginRateLimiter, verify_password
+from serialization import FastJSONProvider, dumps
+from tokens import TokenDenylist
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson for every JSON response, when it's installed
 app.config.from_prefixed_env()
 FRONTEND_URL = app.config.get("FRONTEND_URL")
 cors = CORS(app, origins=FRONTEND_URL, methods=["GET", "POST", "DELETE"])
 print(FRONTEND_URL)
 jwt = JWTManager(app)
 app.teardown_appcontext(close_db)  # Close the database connection after each request
+login_limiter = LoginRateLimiter()
+profiles = ProfileCache(ttl=30)
+denylist = TokenDenylist()
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(_jwt_header: dict, jwt_payload: dict) -> bool:
+    """Called by flask_jwt_extended for every token, a revoked (logged out) token is refused"""
+    return denylist.is_revoked(jwt_payload["jti"])
 
 
 @app.route("/login", methods=["POST"])
-def login() -> dict:
+def login() -> dict | tuple[dict, int]:
     data = request.get_json()
+    if not login_limiter.allow(request.remote_addr, data["username"]):
+        return {"error": "Too many login attempts, please try again later"}, 429
     db = get_db()
     cursor = db.cursor()
-    cursor.execute(
-        "SELECT id FROM users WHERE username = ? AND password = ?",
-        (data["username"], data["password"]),
-    )
+    cursor.execute("SELECT id, password FROM users WHERE username = ?", (data["username"],))
     user = cursor.fetchone()
-    if user is None:
+    ok, new_hash = verify_password(data["password"], user["password"] if user else None)
+    if not ok:
         return {"error": "Invalid username or password"}
     else:
-        access_token = create_access_token(identity=user["id"])
+        if new_hash:  # A plain text password from before, or hashed with other settings
+            cursor.execute("UPDATE users SET password = ? WHERE id = ?", (new_hash, user["id"]))
+            db.commit()
+            profiles.invalidate(str(user["id"]))
+        access_token = create_access_token(identity=str(user["id"]))  # PyJWT only accepts a string "sub"
         return {"access_token": access_token}
 
 
 @app.route("/logout", methods=["POST"])
+@jwt_required()
 def logout() -> dict:
-    # This does absolutely nothing, it's just here to show that you don't really need to do anything special to "log out"
-    # What you will need to do is to delete the access token from the client side, which will effectively log the user out
-    # Alternatively, you can blacklist the token, but that's a more advanced topic
+    # The token stays valid until it expires, so it's added to the denylist until then
+    # (the client should still delete it)
+    token_data = get_jwt()
+    denylist.revoke(token_data["jti"], token_data.get("exp", float("inf")))
     return {"message": "Successfully logged out"}
 
 
+def load_profile(user_id: str) -> PublicUser | None:
+    """The user from the profile cache, or from the database (and then cached)"""
+    user = profiles.get(user_id)
+    if user is None:
+        user = get_public_user(get_db(), user_id)
+        if user is not None:
+            profiles.set(user_id, user)
+    return user
+
+
 @app.route("/users/me")
 @jwt_required()
-def get_me() -> dict:
+def get_me() -> Response | dict:
     token_data = get_jwt()
-    user_id = token_data["sub"]
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT id, username, role, email, age FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
+    user = load_profile(token_data["sub"])
     if user is None:
         return {"error": "User not found"}
     else:
-        return {
-            "id": user["id"],
-            "username": user["username"],
-            "role": user["role"],
-            "email": user["email"],
-            "age": user["age"],
-        }
+        return jsonify(user)
+
+
+@app.route("/users")
+@jwt_required()
+def list_users() -> Response | tuple[dict, int]:
+    # NDJSON: one user (JSON object) per line, sent while the users are read from the database
+    # Only one batch of users is in memory at a time, no matter how many users there are
+    me = load_profile(get_jwt()["sub"])
+    if me is None or me.role != "admin":
+        return {"error": "Only admins can list users"}, 403
+
+    def generate():
+        for batch in iter_public_users(get_db()):
+            yield b"".join(dumps(user) + b"\n" for user in batch)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
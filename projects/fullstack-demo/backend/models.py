@@ -1,10 +1,36 @@
-from dataclasses import dataclass
+import sqlite3
+from collections.abc import Iterator
+from dataclasses import dataclass, fields
 
+from db import row_factory_for
 
-@dataclass
+
+@dataclass(slots=True)
 class PublicUser:
+    # The fields are in alphabetical order: orjson writes them in this order, and Flask's JSON sorts keys
+    age: int | None
+    email: str | None
     id: int
-    username: str
     role: str
-    email: str | None = None
-    age: int | None = None
+    username: str
+
+
+# The columns in the order of the fields, rows are passed to PublicUser(*row) as they are
+PUBLIC_USER_COLUMNS = ", ".join(field.name for field in fields(PublicUser))
+
+
+def get_public_user(db: sqlite3.Connection, user_id: int | str) -> PublicUser | None:
+    """Get a user by id, without the password"""
+    cursor = db.cursor()
+    cursor.row_factory = row_factory_for(PublicUser)
+    cursor.execute(f"SELECT {PUBLIC_USER_COLUMNS} FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def iter_public_users(db: sqlite3.Connection, batch_size: int = 500) -> Iterator[list[PublicUser]]:
+    """All the users in batches of `batch_size`, only one batch is in memory at a time"""
+    cursor = db.cursor()
+    cursor.row_factory = row_factory_for(PublicUser)
+    cursor.execute(f"SELECT {PUBLIC_USER_COLUMNS} FROM users ORDER BY id")
+    while batch := cursor.fetchmany(batch_size):
+        yield batch
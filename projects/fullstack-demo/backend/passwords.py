@@ -0,0 +1,6 @@
+# The password code is shared by all the projects: projects/common/passwords.py
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The projects folder
+from common.passwords import LoginRateLimiter, verify_password  # noqa: E402
@@ -0,0 +1,72 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from db import DB_PATH
+
+CREATE_REVOKED_TOKENS = """CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    jti TEXT NOT NULL UNIQUE,
+    expires REAL NOT NULL
+)"""
+
+
+class TokenDenylist:
+    """Revoked tokens (by their "jti" claim), saved in SQLite and checked in memory
+
+    Every process keeps all the revoked ids that didn't expire yet in a dict, so checking a token is a dict lookup.
+    Revocations by other processes are read from the database once every `sync_interval` seconds (only the new
+    rows). Checking never writes: expired rows are deleted by `revoke`, which writes anyway, and expired ids are
+    dropped from the dict on sync - an expired token is refused anyway
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, sync_interval: float = 5) -> None:
+        self.db_path = db_path
+        self.sync_interval = sync_interval
+        self._revoked: dict[str, float] = {}  # jti -> expiry time (unix time, like the "exp" claim)
+        self._last_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        # Created here once, so a sync only reads
+        db = sqlite3.connect(self.db_path)
+        try:
+            db.execute(CREATE_REVOKED_TOKENS)
+            db.commit()
+        finally:
+            db.close()
+
+    def sync(self) -> None:
+        """Read the tokens that were revoked since the last sync, and forget the expired ones"""
+        now = time.time()
+        db = sqlite3.connect(self.db_path)
+        try:
+            rows = db.execute(
+                "SELECT id, jti, expires FROM revoked_tokens WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+        finally:
+            db.close()
+        with self._lock:
+            self._revoked = {jti: expires for jti, expires in self._revoked.items() if expires >= now}
+            for row_id, jti, expires in rows:
+                self._revoked[jti] = expires
+                self._last_id = row_id
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def revoke(self, jti: str, expires: float) -> None:
+        """Revoke a token until it expires, and delete the expired ones from the database"""
+        db = sqlite3.connect(self.db_path)
+        try:
+            db.execute("INSERT OR IGNORE INTO revoked_tokens (jti, expires) VALUES (?, ?)", (jti, expires))
+            db.execute("DELETE FROM revoked_tokens WHERE expires < ?", (time.time(),))
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self._revoked[jti] = expires
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check a token, without a database query (except for the periodic sync, which only reads)"""
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
@@ -48,8 +48,12 @@ export function UserProfile({ setUserToken }: UserDataProps) {
       <p>Age: {userData.age}</p>
       <p>Role: {userData.role}</p>
       <p><button onClick={() => {
-        localStorage.removeItem("access_token");
-        setUserToken(null);
+        // Revoke the token on the server too, it would otherwise stay valid until it expires
+        fetch(BACKEND_URL + "/logout", { method: "POST", headers: { "Authorization": "Bearer " + localStorage.getItem("access_token") } })
+          .finally(() => {
+            localStorage.removeItem("access_token");
+            setUserToken(null);
+          });
       }}>Logout</button></p>
     </>
   } else {
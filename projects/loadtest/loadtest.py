@@ -0,0 +1,324 @@
+# Load test the web projects: every app runs on a copy of its folder, with a freshly seeded SQLite database
+# (the real data.db files aren't touched), and is driven by concurrent clients. Everything runs locally
+# python loadtest.py --clients 16 --duration 10 --output results.json
+# python loadtest.py sales-website sales-website-asgi --clients 32 --duration 30
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+PROJECTS = Path(__file__).resolve().parent.parent
+PASSWORD = "1234"
+ENV = {
+    "FLASK_JWT_SECRET_KEY": "load test secret key",  # fullstack-demo reads its config from FLASK_* variables
+    "FLASK_FRONTEND_URL": "http://localhost:5173",
+    "LOGIN_RATE_LIMIT": "off",  # All the clients come from one IP, and log in again and again (see passwords.py)
+}
+
+
+class Client:
+    # One simulated user: a keep-alive connection, its cookies and headers, and the time of every request
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.cookies = {}
+        self.headers = {}
+        self.results = []  # (scenario, start, seconds, ok)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = {**self.headers, **(headers or {})}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()  # Reconnects on the next request
+            raise
+        for cookie in response.headers.get_all("Set-Cookie") or []:
+            name, _, rest = cookie.partition("=")
+            self.cookies[name] = rest.split(";")[0]
+        if response.will_close:
+            self.connection.close()
+        return response.status, data
+
+    def timed(self, scenario, method, path, body=None, headers=None, expect=200):
+        start = time.perf_counter()
+        try:
+            status, data = self.request(method, path, body, headers)
+        except (http.client.HTTPException, OSError):
+            status, data = None, b""
+        self.results.append((scenario, start, time.perf_counter() - start, status == expect))
+        return status, data
+
+
+def insert_users(db, users):
+    db.executemany(
+        "INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+        [(f"loadtest{i}", PASSWORD) for i in range(users)],
+    )
+
+
+def seed_sales_website(folder, args):
+    # Seed functions get the copy of the project folder and the command line settings
+    subprocess.run([sys.executable, "create_db.py"], cwd=folder, check=True, stdout=subprocess.DEVNULL)
+    db = sqlite3.connect(folder / "data.db")
+    db.executemany(
+        "INSERT OR IGNORE INTO products (id, title, description, price, category, image) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (i, f"Product {i}", f"Load test product number {i}", round(1 + i % 500 * 0.37, 2), "load test", "")
+            for i in range(1, args.products + 1)
+        ],
+    )
+    db.execute("UPDATE products SET stock = 1000000")
+    insert_users(db, args.users)
+    # A session per client, so the Flask and the ASGI app run exactly the same requests (no login page in asgi.py)
+    # Same table and format as sessions.SQLiteSessionStore (plain JSON for a dict of strings)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+    )
+    db.executemany(
+        """INSERT OR REPLACE INTO sessions (id, data, expires)
+        SELECT ?, json_object('user_id', CAST(id AS TEXT)), ? FROM users WHERE username = ?""",
+        [(f"loadtest{i}", time.time() + 86400, f"loadtest{i % args.users}") for i in range(args.clients)],
+    )
+    db.commit()
+
+
+def seed_flask_website(folder, args):
+    subprocess.run([sys.executable, "db_setup.py"], cwd=folder, check=True)
+    db = sqlite3.connect(folder / "data.db")
+    insert_users(db, args.users)
+    db.commit()
+
+
+def seed_fullstack_demo(folder, args):
+    subprocess.run([sys.executable, "db.py"], cwd=folder, check=True)
+    db = sqlite3.connect(folder / "data.db")
+    insert_users(db, args.users)
+    db.commit()
+
+
+def sales_session(client, number, rng, args):
+    # Client setup and scenario functions get (client, client number, random generator, settings)
+    client.cookies["session"] = f"loadtest{number}"
+
+
+def sales_products(client, number, rng, args):
+    after_id = rng.randrange(0, args.products, 50)
+    client.timed("products", "GET", f"/products?after_id={after_id}&limit=50")
+
+
+def sales_add_to_cart(client, number, rng, args):
+    client.timed("add_to_cart", "GET", f"/add_to_cart/{rng.randint(1, args.products)}")
+
+
+def flask_website_login(client, number, rng, args):
+    form = urlencode({"username": f"loadtest{rng.randrange(args.users)}", "password": PASSWORD})
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    client.timed("auth_login", "POST", "/auth/login", form, headers, expect=302)  # Redirects home on success
+
+
+def fullstack_token(client, number, rng, args):
+    body = json.dumps({"username": f"loadtest{number % args.users}", "password": PASSWORD})
+    _, data = client.request("POST", "/login", body, {"Content-Type": "application/json"})
+    client.headers["Authorization"] = f"Bearer {json.loads(data)['access_token']}"
+
+
+def fullstack_login(client, number, rng, args):
+    body = json.dumps({"username": f"loadtest{rng.randrange(args.users)}", "password": PASSWORD})
+    client.timed("login", "POST", "/login", body, {"Content-Type": "application/json"})
+
+
+def fullstack_users_me(client, number, rng, args):
+    client.timed("users_me", "GET", "/users/me")
+
+
+def flask_command(port, args):
+    # The flask command skips the app.run() call at the end of main.py
+    return [sys.executable, "-m", "flask", "--app", "main", "run", "--port", str(port), "--no-reload", "--no-debugger"]
+
+
+def uvicorn_command(port, args):
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--workers", str(args.workers)]
+
+
+# name -> project folder, seed, server command, client setup, [(scenario, weight)]
+TARGETS = {
+    "sales-website": (
+        "sales-website",
+        seed_sales_website,
+        flask_command,
+        sales_session,
+        [(sales_products, 3), (sales_add_to_cart, 1)],
+    ),
+    "sales-website-asgi": (
+        "sales-website",
+        seed_sales_website,
+        uvicorn_command,
+        sales_session,
+        [(sales_products, 3), (sales_add_to_cart, 1)],
+    ),
+    "flask-website": ("flask-website", seed_flask_website, flask_command, None, [(flask_website_login, 1)]),
+    "fullstack-demo": (
+        "fullstack-demo/backend",
+        seed_fullstack_demo,
+        flask_command,
+        fullstack_token,
+        [(fullstack_users_me, 3), (fullstack_login, 1)],
+    ),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(folder, command, port, log_path, env, timeout=20):
+    with open(log_path, "w") as log:  # The server keeps its own copy of the file
+        process = subprocess.Popen(command, cwd=folder, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited:\n{Path(log_path).read_text()}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"The server didn't start in {timeout} seconds:\n{Path(log_path).read_text()}")
+
+
+def run_client(client, number, setup, scenarios, args, stop_at):
+    rng = random.Random(args.seed * 1_000_003 + number)  # Every client makes the same choices on every run
+    functions = [function for function, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+    if setup is not None:
+        setup(client, number, rng, args)
+    while time.perf_counter() < stop_at:
+        rng.choices(functions, weights)[0](client, number, rng, args)
+
+
+def percentile(sorted_times, p):
+    return sorted_times[min(len(sorted_times) - 1, int(len(sorted_times) * p / 100))]
+
+
+def summarize(results, seconds):
+    # results = [(start, seconds, ok)] -> throughput and latency (in milliseconds)
+    times = sorted(duration for _, duration, _ in results)
+    errors = sum(not ok for _, _, ok in results)
+    if not times:
+        return {"requests": 0, "errors": 0, "throughput": 0}
+    return {
+        "requests": len(times),
+        "errors": errors,
+        "throughput": len(times) / seconds,
+        "mean_ms": statistics.mean(times) * 1000,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "max_ms": times[-1] * 1000,
+    }
+
+
+def run_target(name, args):
+    project, seed, command, setup, scenarios = TARGETS[name]
+    with tempfile.TemporaryDirectory() as temp:
+        # The same layout as in projects/, so the project still finds common/ (see its passwords.py)
+        folder = Path(temp) / project
+        ignore = shutil.ignore_patterns("*.db", "*.db-*", "__pycache__", "node_modules")
+        shutil.copytree(PROJECTS / project, folder, ignore=ignore)
+        shutil.copytree(PROJECTS / "common", Path(temp) / "common", ignore=ignore)
+        seed(folder, args)
+        port = free_port()
+        env = {**ENV, "PASSWORD_COST": args.password_cost}
+        server = start_server(folder, command(port, args), port, Path(temp) / "server.log", env)
+        try:
+            clients = [Client(port) for _ in range(args.clients)]
+            start = time.perf_counter()
+            measure_from = start + args.warmup
+            stop_at = measure_from + args.duration
+            threads = [
+                threading.Thread(target=run_client, args=(client, number, setup, scenarios, args, stop_at))
+                for number, client in enumerate(clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    # Only requests that started after the warmup are counted
+    by_scenario = {}
+    for client in clients:
+        for scenario, started, duration, ok in client.results:
+            if started >= measure_from:
+                by_scenario.setdefault(scenario, []).append((started, duration, ok))
+    summary = {scenario: summarize(results, args.duration) for scenario, results in sorted(by_scenario.items())}
+    summary["total"] = summarize([result for results in by_scenario.values() for result in results], args.duration)
+    return summary
+
+
+def print_summary(name, summary):
+    print(name)
+    for scenario, result in summary.items():
+        if not result["requests"]:
+            print(f"  {scenario:<14}no requests")
+            continue
+        print(
+            f"  {scenario:<14}{result['throughput']:>9.1f} req/s  p50 {result['p50_ms']:>7.1f} ms"
+            f"  p95 {result['p95_ms']:>7.1f} ms  p99 {result['p99_ms']:>7.1f} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Flask projects on local seeded databases")
+    parser.add_argument("targets", nargs="*", help=f"Any of {', '.join(TARGETS)} (default: all of them)")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds before measuring starts")
+    parser.add_argument("--users", type=int, default=100, help="Users to seed")
+    parser.add_argument("--products", type=int, default=1000, help="Products to seed (sales website)")
+    parser.add_argument("--workers", type=int, default=4, help="Server processes (ASGI only)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the clients' random choices")
+    parser.add_argument(
+        "--password-costs", nargs="+", default=["default"], help="Run every target with each of these (passwords.COSTS)"
+    )
+    parser.add_argument("--output", help="Save the results to a .json file")
+    args = parser.parse_args()
+    for name in args.targets:
+        if name not in TARGETS:
+            parser.error(f"Unknown target {name}")
+
+    report = {"settings": {key: value for key, value in vars(args).items() if key != "output"}, "results": {}}
+    for cost in args.password_costs:
+        args.password_cost = cost
+        for name in args.targets or list(TARGETS):
+            label = name if len(args.password_costs) == 1 else f"{name} (password cost {cost})"
+            try:
+                summary = run_target(name, args)
+            except (RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"{label}: skipped, {e}")
+                report["results"][label] = {"error": str(e)}
+                continue
+            print_summary(label, summary)
+            report["results"][label] = summary
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
@@ -1,3 +1,4 @@
+import array
 import itertools
 import random
 
@@ -16,10 +17,56 @@ import random
 #     return deck
 
 
+SUITS = "♥♦♣♠"
+VALUES = "23456789TJQKA"
+SUIT_LETTERS = {"h": "♥", "d": "♦", "c": "♣", "s": "♠"}
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]  # One prime per value, used by checks.hand_score
+
+
 def create_deck():
-    suits = "♥♦♣♠"
-    values = "23456789TJQKA"
-    return list(itertools.product(values, suits))
+    return list(itertools.product(VALUES, SUITS))
+
+
+# Cards as integers:
+# A card index is a number from 0 to 51: value_index * 4 + suit_index
+# An encoded card packs everything the hand evaluator needs into one int:
+# +--------+--------+--------+--------+
+# |xxxbbbbb|bbbbbbbb|sssscccc|xxpppppp|
+# +--------+--------+--------+--------+
+# b = one bit per value (2 = bit 0, A = bit 12)
+# s = one bit per suit
+# c = value index (0-12)
+# p = the prime number of the value (2, 3, 5 ... 41)
+def card_index(card):
+    value, suit = card
+    return VALUES.index(value) * 4 + SUITS.index(suit)
+
+
+def index_card(index):
+    return (VALUES[index // 4], SUITS[index % 4])
+
+
+def parse_card(text):
+    # "As" / "A♠" -> ("A", "♠"), easier to type than the suit symbols
+    value, suit = text[0].upper(), text[1:]
+    suit = SUIT_LETTERS.get(suit.lower(), suit)
+    if value not in VALUES or suit not in SUITS:
+        raise ValueError(f"Invalid card: {text}")
+    return (value, suit)
+
+
+def encode_card(card):
+    if not isinstance(card, int):
+        card = card_index(card)
+    value_index, suit_index = divmod(card, 4)
+    return (1 << (16 + value_index)) | (1 << (12 + suit_index)) | (value_index << 8) | PRIMES[value_index]
+
+
+def encode_hand(hand):
+    return [encode_card(card) for card in hand]
+
+
+ENCODED_DECK = [encode_card(i) for i in range(52)]  # ENCODED_DECK[card_index] = encoded card
 
 
 def deal_cards(deck, number):
@@ -48,3 +95,72 @@ def deal_cards(deck, number):
 #     for i in range(0, number):
 #         card = deck.pop()
 #         player_cards.append(card)
+
+
+class Deck:
+    # A deck that never allocates a new list per hand:
+    # the cards live in one array (card indices, see card_index), and `position` marks how many were dealt
+    # Drawing is a partial Fisher-Yates shuffle - only the drawn cards are shuffled, so k cards cost O(k)
+    # Reset is O(1): the array always holds every card (in some order), so we only move `position` back
+
+    def __init__(self, decks=1, rng=None):
+        self.cards = array.array("B", range(52)) * decks
+        self.position = 0
+        self.rng = rng or random.Random()
+
+    def __len__(self):
+        return len(self.cards) - self.position  # Cards left
+
+    def reset(self):
+        self.position = 0
+
+    def _draw(self, number):
+        # Shuffle `number` random cards into the next positions, returns where they start
+        if number > len(self):
+            raise ValueError(f"Can't draw {number} cards, only {len(self)} left in the deck")
+        cards = self.cards
+        randrange = self.rng.randrange
+        end = len(cards)
+        start = self.position
+        for i in range(start, start + number):
+            j = randrange(i, end)
+            cards[i], cards[j] = cards[j], cards[i]
+        self.position += number
+        return start
+
+    def draw(self, number):
+        # Same result as deal_cards: a list of (value, suit) tuples
+        start = self._draw(number)
+        return [CARDS[card] for card in self.cards[start : self.position]]
+
+    def draw_into(self, hand, encoded=False):
+        # Fill an existing list with len(hand) cards, to reuse the same list for every hand
+        start = self._draw(len(hand))
+        table = ENCODED_DECK if encoded else CARDS
+        for i in range(len(hand)):
+            hand[i] = table[self.cards[start + i]]
+        return hand
+
+    def deal(self, number, players=1, encoded=False):
+        # Generator: yields hands of `number` cards until the deck can't fill another round
+        # The same list is reused for every hand, copy it (list(hand)) if you need to keep it
+        hand = [None] * number
+        while len(self) >= number * players:
+            for _ in range(players):
+                yield self.draw_into(hand, encoded)
+
+
+class Shoe(Deck):
+    # A few decks shuffled together (like in a casino), reshuffled automatically when the cut card comes out
+    # A hand from a shoe can have the same card twice, checks.hand_score scores those too (five of a kind...)
+    def __init__(self, decks=6, penetration=0.75, rng=None):
+        super().__init__(decks, rng)
+        self.cut_card = int(len(self.cards) * penetration)
+
+    def _draw(self, number):
+        if self.position >= self.cut_card or number > len(self):
+            self.reset()
+        return super()._draw(number)
+
+
+CARDS = create_deck()  # CARDS[card_index] = (value, suit)
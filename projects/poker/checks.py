@@ -1,5 +1,8 @@
+import itertools
 from collections import Counter
 
+from cards import PRIMES, encode_card
+
 
 def check_hand(hand):
     values = []
@@ -36,3 +39,116 @@ def check_hand(hand):
 #         return "Three of a kind"
 #     if most_common == 4:
 #         return "Four of a kind"
+
+
+# Fast evaluator for encoded cards (see cards.encode_card)
+# Every 5 card hand gets a score, a higher score is a better hand
+# score = category * CATEGORY_BASE + kickers (up to 5 value indices in base 13)
+HAND_CATEGORIES = [
+    "High card",
+    "Pair",
+    "Two pair",
+    "Three of a kind",
+    "Straight",
+    "Flush",
+    "Full house",
+    "Four of a kind",
+    "Straight flush",
+    "Five of a kind",  # Only with several decks (cards.Shoe)
+]
+CATEGORY_BASE = 13**5
+WHEEL = [0, 1, 2, 3, 12]  # A-2-3-4-5, the lowest straight
+
+
+def _straight_high(values):
+    # values = sorted list of 5 different value indices
+    if values == WHEEL:
+        return 3  # The "5" is the highest card in a wheel
+    if values[4] - values[0] == 4:
+        return values[4]
+    return None
+
+
+def _score(category, kickers):
+    kickers_value = 0
+    for value in kickers:
+        kickers_value = kickers_value * 13 + value
+    kickers_value *= 13 ** (5 - len(kickers))
+    return HAND_CATEGORIES.index(category) * CATEGORY_BASE + kickers_value
+
+
+def _build_tables():
+    flush_scores = {}  # bitmask of values -> score
+    scores = {}  # product of primes -> score
+    for values in itertools.combinations_with_replacement(range(13), 5):
+        counts = Counter(values)
+        # Highest count first, then highest value first: (7, 7, 7, 2, 2) -> [7, 2]
+        kickers = sorted(counts, key=lambda value: (counts[value], value), reverse=True)
+        pattern = sorted(counts.values(), reverse=True)
+        product = 1
+        for value in values:
+            product *= PRIMES[value]
+
+        if len(counts) == 5:
+            mask = 0
+            for value in values:
+                mask |= 1 << value
+            high = _straight_high(list(values))
+            if high is not None:
+                scores[product] = _score("Straight", [high])
+                flush_scores[mask] = _score("Straight flush", [high])
+            else:
+                scores[product] = _score("High card", kickers)
+                flush_scores[mask] = _score("Flush", kickers)
+        elif pattern == [2, 1, 1, 1]:
+            scores[product] = _score("Pair", kickers)
+        elif pattern == [2, 2, 1]:
+            scores[product] = _score("Two pair", kickers)
+        elif pattern == [3, 1, 1]:
+            scores[product] = _score("Three of a kind", kickers)
+        elif pattern == [3, 2]:
+            scores[product] = _score("Full house", kickers)
+        elif pattern == [4, 1]:
+            scores[product] = _score("Four of a kind", kickers)
+        elif pattern == [5]:
+            scores[product] = _score("Five of a kind", kickers)
+    return flush_scores, scores
+
+
+FLUSH_SCORES, SCORES = _build_tables()
+
+
+def _repeated_flush_score(encoded_hand):
+    # A flush with the same value twice (only from a Shoe): the better of the flush and the pairs / trips...
+    # A flush beats a pair or three of a kind, a full house or better beats the flush
+    values = sorted(((card >> 8) & 0xF for card in encoded_hand), reverse=True)
+    product = 1
+    for card in encoded_hand:
+        product *= card & 0xFF
+    return max(_score("Flush", values), SCORES[product])
+
+
+def hand_score(encoded_hand):
+    c1, c2, c3, c4, c5 = encoded_hand
+    if c1 & c2 & c3 & c4 & c5 & 0xF000:  # All cards share the same suit bit
+        try:
+            return FLUSH_SCORES[(c1 | c2 | c3 | c4 | c5) >> 16]
+        except KeyError:  # Less than 5 different values
+            return _repeated_flush_score(encoded_hand)
+    return SCORES[(c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF)]
+
+
+def best_hand_score(encoded_cards):
+    # Best 5 card hand out of 6 or 7 cards (Texas Hold'em)
+    return max(hand_score(hand) for hand in itertools.combinations(encoded_cards, 5))
+
+
+def hand_category(score):
+    return HAND_CATEGORIES[score // CATEGORY_BASE]
+
+
+def check_hand_fast(hand):
+    # Same idea as check_hand, but detects every category
+    # Accepts (value, suit) tuples, card indices or encoded cards
+    encoded_hand = [card if isinstance(card, int) and card > 51 else encode_card(card) for card in hand]
+    return hand_category(hand_score(encoded_hand))
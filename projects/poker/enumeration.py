@@ -0,0 +1,141 @@
+# Exact hand probabilities - walk every possible hand instead of dealing random ones
+# Example: python enumeration.py --known "As Ks" --hand-size 7
+import argparse
+import itertools
+import math
+import time
+from collections import Counter
+
+from cards import ENCODED_DECK, PRIMES, card_index, parse_card
+from checks import CATEGORY_BASE, HAND_CATEGORIES, best_hand_score, hand_category, hand_score
+
+
+def unrank_combination(rank, n, k):
+    # The combination at position `rank` (in lexicographic order) of `k` out of range(n)
+    # unrank_combination(0, 52, 5) -> (0, 1, 2, 3, 4)
+    if not 0 <= rank < math.comb(n, k):
+        raise IndexError(f"There are only {math.comb(n, k)} combinations")
+    combination = []
+    x = 0
+    for left in range(k, 0, -1):
+        while math.comb(n - x - 1, left - 1) <= rank:
+            rank -= math.comb(n - x - 1, left - 1)
+            x += 1
+        combination.append(x)
+        x += 1
+    return tuple(combination)
+
+
+def iter_combinations(pool, k, start=0, stop=None):
+    # Like itertools.combinations(pool, k), but only positions start...stop
+    # Jumps straight to `start`, so different ranges can be walked separately (or in parallel)
+    n = len(pool)
+    stop = math.comb(n, k) if stop is None else min(stop, math.comb(n, k))
+    if start >= stop:
+        return
+    if start == 0:
+        yield from itertools.islice(itertools.combinations(pool, k), stop)
+        return
+    combination = list(unrank_combination(start, n, k))
+    for _ in range(stop - start):
+        yield tuple(pool[i] for i in combination)
+        i = k - 1
+        while i >= 0 and combination[i] == n - k + i:
+            i -= 1
+        if i < 0:
+            return
+        combination[i] += 1
+        for j in range(i + 1, k):
+            combination[j] = combination[j - 1] + 1
+
+
+# Per card index: the prime of its value, and a 1 in the 4 bits of its suit (to count suits with a single sum)
+CARD_PRIMES = [PRIMES[card // 4] for card in range(52)]
+CARD_SUIT_COUNTERS = [1 << (4 * (card % 4)) for card in range(52)]
+
+
+def hand_pattern(cards):
+    # Everything the category of 6 or 7 cards (card indices) depends on:
+    # the values (as a product of primes) and the values of the flush cards (if there is a flush)
+    # Many hands share a pattern, so the category is only calculated once per pattern
+    values = math.prod(map(CARD_PRIMES.__getitem__, cards))
+    suit_counts = sum(map(CARD_SUIT_COUNTERS.__getitem__, cards))
+    if (suit_counts + 0x3333) & 0x8888:  # Some suit has 5 or more cards (a count of 5 + 3 sets the 4th bit)
+        flush_values = tuple(sorted(card // 4 for card in cards if (suit_counts >> (4 * (card % 4))) & 0xF >= 5))
+        return values, flush_values
+    return values
+
+
+def count_categories(known=(), hand_size=5, start=0, stop=None, cache=None):
+    # Walk every way to complete the known cards to `hand_size` cards, count the categories
+    # `known` are card indices, start/stop select a range of the completions (see iter_combinations)
+    # 5 card hands are already a single table lookup (checks.hand_score), bigger hands use a pattern cache
+    counts = [0] * len(HAND_CATEGORIES)
+    missing = hand_size - len(known)
+    if hand_size == 5:
+        known = tuple(ENCODED_DECK[card] for card in known)
+        remaining = [card for card in ENCODED_DECK if card not in known]
+        for combination in iter_combinations(remaining, missing, start, stop):
+            counts[hand_score(known + combination) // CATEGORY_BASE] += 1
+    else:
+        cache = {} if cache is None else cache  # pattern -> category index
+        known = tuple(known)
+        remaining = [card for card in range(52) if card not in known]
+        for combination in iter_combinations(remaining, missing, start, stop):
+            cards = known + combination
+            pattern = hand_pattern(cards)
+            category = cache.get(pattern)
+            if category is None:
+                category = best_hand_score([ENCODED_DECK[card] for card in cards]) // CATEGORY_BASE
+                cache[pattern] = category
+            counts[category] += 1
+    return Counter({HAND_CATEGORIES[i]: count for i, count in enumerate(counts) if count})
+
+
+def count_categories_by_pattern():
+    # All 2,598,960 five card hands, without walking them one by one:
+    # every multiset of values is checked once, and counted by the number of ways to pick its suits
+    counts = Counter()
+    for values in itertools.combinations_with_replacement(range(13), 5):
+        value_counts = Counter(values).values()
+        if max(value_counts) == 5:
+            continue
+        # Any suits for these values: choose a suit for every copy of a value
+        ways = math.prod(math.comb(4, count) for count in value_counts)
+        cards = [value * 4 + suit for value in set(values) for suit in range(values.count(value))]
+        if len(value_counts) == 5:
+            # Different values are all in suit 0 here, so this is the flush (one for every suit)
+            counts[hand_category(best_hand_score([ENCODED_DECK[card] for card in cards]))] += 4
+            cards[0] += 1  # Not a flush anymore, this stands for all the other suit choices
+            ways -= 4
+        counts[hand_category(best_hand_score([ENCODED_DECK[card] for card in cards]))] += ways
+    return counts
+
+
+def exact_probabilities(known=(), hand_size=5):
+    # `known` can be (value, suit) tuples or card indices
+    known = [card if isinstance(card, int) else card_index(card) for card in known]
+    if len(set(known)) != len(known):
+        raise ValueError("The same card was dealt twice")
+    if len(known) > hand_size:
+        raise ValueError(f"Too many known cards for a hand of {hand_size}")
+    if not known and hand_size == 5:
+        counts = count_categories_by_pattern()
+    else:
+        counts = count_categories(known, hand_size)
+    total = sum(counts.values())
+    return {category: counts[category] / total for category in HAND_CATEGORIES}, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exact poker hand probabilities")
+    parser.add_argument("--known", default="", help='Cards that are already known, like "As Ks"')
+    parser.add_argument("--hand-size", type=int, default=5, help="5 for a single hand, 7 for Texas Hold'em")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    known = [parse_card(text) for text in args.known.split()]
+    probabilities, total = exact_probabilities(known, args.hand_size)
+    for category, probability in probabilities.items():
+        print(f"{category:<16}{probability:>12.6%}")
+    print(f"{total:,} hands in {time.perf_counter() - start:.2f} seconds")
@@ -0,0 +1,92 @@
+# pip install numpy
+# Texas Hold'em equity: how often does every player win, given their hole cards and the board so far?
+# Example: python equity.py "As Ks" "Qh Qd" --board "2c 7h 9s" --workers 4 --seed 42
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cards import create_deck, encode_card, parse_card
+from checks import best_hand_score
+
+# Simulations per task. This is fixed (and so is the seed of every task), so the result
+# only depends on the seed, not on the number of workers that happen to run the tasks
+CHUNK_SIZE = 5_000
+
+
+def simulate_chunk(players_cards, board, remaining, iterations, seed_sequence):
+    # All cards here are encoded cards (see cards.encode_card)
+    # Returns (wins, ties, shares) - one count per player
+    # shares = the part of the pot won, a split pot between 2 players adds 0.5 to each of them
+    rng = np.random.default_rng(seed_sequence)
+    missing = 5 - len(board)
+    players = len(players_cards)
+    wins = [0] * players
+    ties = [0] * players
+    shares = [0.0] * players
+    draws = rng.permuted(np.tile(np.arange(len(remaining)), (iterations, 1)), axis=1)[:, :missing]
+    for draw in draws.tolist():
+        full_board = board + [remaining[i] for i in draw]
+        scores = [best_hand_score(hole + full_board) for hole in players_cards]
+        best = max(scores)
+        winners = [player for player in range(players) if scores[player] == best]
+        if len(winners) == 1:
+            wins[winners[0]] += 1
+        else:
+            for player in winners:
+                ties[player] += 1
+        for player in winners:
+            shares[player] += 1 / len(winners)
+    return wins, ties, shares
+
+
+def estimate_equity(players_cards, board=(), iterations=100_000, workers=None, seed=None):
+    # players_cards = [[("A", "♠"), ("K", "♠")], [("Q", "♥"), ("Q", "♦")]], board = [("2", "♣"), ...]
+    # Returns a list of dicts, one per player: {"win": ..., "tie": ..., "equity": ...}
+    known = [card for hole in players_cards for card in hole] + list(board)
+    if len(set(known)) != len(known):
+        raise ValueError("The same card was dealt twice")
+    if len(board) > 5:
+        raise ValueError("The board can't have more than 5 cards")
+    remaining = [encode_card(card) for card in create_deck() if card not in known]
+    encoded_players = [[encode_card(card) for card in hole] for hole in players_cards]
+    encoded_board = [encode_card(card) for card in board]
+
+    chunks = [CHUNK_SIZE] * (iterations // CHUNK_SIZE)
+    if iterations % CHUNK_SIZE:
+        chunks.append(iterations % CHUNK_SIZE)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunks))  # Independent streams, one per chunk
+    tasks = [(encoded_players, encoded_board, remaining, size, seq) for size, seq in zip(chunks, seed_sequences)]
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        results = [simulate_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_chunk, *zip(*tasks)))
+
+    # Merge the partial counts, always in the same (chunk) order
+    equity = []
+    for player in range(len(players_cards)):
+        wins = sum(chunk_wins[player] for chunk_wins, _, _ in results)
+        ties = sum(chunk_ties[player] for _, chunk_ties, _ in results)
+        shares = sum(chunk_shares[player] for _, _, chunk_shares in results)
+        equity.append({"win": wins / iterations, "tie": ties / iterations, "equity": shares / iterations})
+    return equity
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo Texas Hold'em equity")
+    parser.add_argument("hands", nargs="+", help='Hole cards of every player, like "As Ks"')
+    parser.add_argument("--board", default="", help='Known board cards, like "2c 7h 9s"')
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    players_cards = [[parse_card(text) for text in hand.split()] for hand in args.hands]
+    board = [parse_card(text) for text in args.board.split()]
+    results = estimate_equity(players_cards, board, args.iterations, args.workers, args.seed)
+    for hand, result in zip(args.hands, results):
+        print(f"{hand:<10} win {result['win']:.2%}  tie {result['tie']:.2%}  equity {result['equity']:.2%}")
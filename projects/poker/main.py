@@ -1,11 +1,12 @@
-from cards import create_deck, deal_cards
+from cards import Deck
 from checks import check_hand
 
-deck = create_deck()
+deck = Deck()
 number_of_players = 5
 for i in range(0, number_of_players):
-    player_hand = deal_cards(deck, 5)
+    player_hand = deck.draw(5)
     hand_result = check_hand(player_hand)
     print(player_hand, hand_result)
 
 print(len(deck))
+deck.reset()  # All 52 cards are back in the deck, ready for the next round
@@ -0,0 +1,80 @@
+# pip install numpy
+# Deal and check millions of hands at once, instead of one tuple at a time
+# Cards here are card indices (see cards.card_index): value = card // 4, suit = card % 4
+import argparse
+import time
+
+import numpy as np
+
+from checks import HAND_CATEGORIES, WHEEL
+
+# Bitmask of the values in every possible straight (one bit per value, like in cards.encode_card)
+STRAIGHT_MASKS = np.array([0b11111 << low for low in range(9)] + [sum(1 << value for value in WHEEL)])
+VALUE_BITS = 1 << np.arange(13)
+
+
+def deal_batch(rng, deals, players, cards_per_player=5):
+    # Every row is a full deck, shuffled on its own (a permutation per deal)
+    decks = np.tile(np.arange(52, dtype=np.int8), (deals, 1))
+    decks = rng.permuted(decks, axis=1)
+    cards = decks[:, : players * cards_per_player]
+    return cards.reshape(deals, players, cards_per_player)  # shape = (deals, players, cards)
+
+
+def classify_batch(hands):
+    # hands = any array of 5 card hands, shape = (..., 5)
+    # Returns an array of category indices (see checks.HAND_CATEGORIES), shape = (...)
+    values = hands // 4
+    suits = hands % 4
+    counts = (values[..., np.newaxis] == np.arange(13)).sum(axis=-2)  # shape = (..., 13)
+    sorted_counts = np.sort(counts, axis=-1)
+    most_common = sorted_counts[..., -1]
+    second_most_common = sorted_counts[..., -2]
+    is_flush = (suits == suits[..., :1]).all(axis=-1)
+    is_straight = np.isin((counts > 0) @ VALUE_BITS, STRAIGHT_MASKS)
+
+    # Later lines win, so better categories are set last
+    categories = np.zeros(most_common.shape, dtype=np.int8)
+    categories[most_common == 2] = HAND_CATEGORIES.index("Pair")
+    categories[(most_common == 2) & (second_most_common == 2)] = HAND_CATEGORIES.index("Two pair")
+    categories[most_common == 3] = HAND_CATEGORIES.index("Three of a kind")
+    categories[is_straight] = HAND_CATEGORIES.index("Straight")
+    categories[is_flush] = HAND_CATEGORIES.index("Flush")
+    categories[(most_common == 3) & (second_most_common == 2)] = HAND_CATEGORIES.index("Full house")
+    categories[most_common == 4] = HAND_CATEGORIES.index("Four of a kind")
+    categories[is_straight & is_flush] = HAND_CATEGORIES.index("Straight flush")
+    return categories
+
+
+def simulate(hands, players=5, seed=None, batch_size=200_000):
+    # Deal `hands` hands in batches, returns (count per category, seconds)
+    if players * 5 > 52:
+        raise ValueError(f"Can't deal 5 cards to {players} players from a single deck")
+    rng = np.random.default_rng(seed)
+    totals = np.zeros(len(HAND_CATEGORIES), dtype=np.int64)
+    deals_per_batch = max(1, batch_size // players)
+    deals_left = -(-hands // players)  # Round up, every deal gives a hand to all players
+    start = time.perf_counter()
+    while deals_left > 0:
+        deals = min(deals_per_batch, deals_left)
+        categories = classify_batch(deal_batch(rng, deals, players))
+        totals += np.bincount(categories.ravel(), minlength=len(HAND_CATEGORIES))
+        deals_left -= deals
+    return totals, time.perf_counter() - start
+
+
+def print_report(totals, seconds):
+    total_hands = int(totals.sum())
+    for category, count in zip(HAND_CATEGORIES, totals):
+        print(f"{category:<16}{count:>12,}{count / total_hands:>10.4%}")
+    print(f"{total_hands:,} hands in {seconds:.2f} seconds ({total_hands / seconds:,.0f} hands per second)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo poker hand frequencies")
+    parser.add_argument("--hands", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=200_000)
+    args = parser.parse_args()
+    print_report(*simulate(args.hands, args.players, args.seed, args.batch_size))
@@ -0,0 +1,95 @@
+# pip install fastapi uvicorn
+# The products and cart API of the sales website as an async app, on the same database and sessions as main.py
+# (log in through main.py, the session cookie works here too). The queries are the ones the Flask views use
+# Run with: uvicorn asgi:app --workers 4
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import fastapi
+from fastapi import Cookie, HTTPException, Request, Response
+
+from cache import catalog_cache
+from db import pool
+from models.carts import add_cart_item, select_cart
+from models.products import select_product, select_products
+from sessions import SQLiteSessionStore
+
+app = fastapi.FastAPI()
+# sqlite3 can't be awaited, so every query runs on one of these threads - the event loop keeps serving
+# other requests meanwhile. One thread per pooled connection, so a thread never waits for a connection
+db_executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="db")
+session_store = SQLiteSessionStore("data.db")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+async def run_query(query, *args, session=None, commit=False):
+    # Runs query(cursor, *args) with a connection from the pool, on a database thread
+    # With `session` (the session id cookie that main.py sets on login, "session" is Flask's default cookie name),
+    # the user id is looked up first and passed as the first argument - in the same trip to the database thread
+    def run():
+        if session is not None:
+            data = session_store.get(session) if session else None
+            if not data or "user_id" not in data:
+                return None, False
+            query_args = (data["user_id"], *args)
+        else:
+            query_args = args
+        db = pool.acquire()
+        try:
+            result = query(db.cursor(), *query_args)
+            if commit:
+                db.commit()
+            return result, True
+        finally:
+            pool.release(db)
+
+    result, logged_in = await asyncio.get_running_loop().run_in_executor(db_executor, run)
+    if not logged_in:
+        raise HTTPException(status_code=401, detail="Not logged in")
+    return result
+
+
+@app.get("/products")
+async def product_list(request: Request, after_id: int = 0, limit: int = DEFAULT_PAGE_SIZE):
+    # Same keyset pagination and ETag as views/products.py, JSON only
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    etag = f'"products-{catalog_cache.tag}-{after_id}-{limit}-json"'
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # The encoded page is cached, so a hit doesn't leave the event loop and doesn't encode anything
+    cached = catalog_cache.get(("products-json", after_id, limit))
+    if cached is None:
+        data, next_after_id = await run_query(select_products, after_id, limit)
+        cached = (json.dumps(data).encode(), next_after_id)
+        catalog_cache.set(("products-json", after_id, limit), cached)
+    body, next_after_id = cached
+
+    headers = {"ETag": etag, "Access-Control-Allow-Origin": "*"}
+    if next_after_id is not None:
+        headers["Link"] = f'</products?after_id={next_after_id}&limit={limit}>; rel="next"'
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/products/{product_id}")
+async def product_page(product_id: int):
+    data = catalog_cache.get(("product", product_id))
+    if data is None:
+        data = await run_query(select_product, product_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="PRODUCT NOT FOUND")
+        catalog_cache.set(("product", product_id), data)
+    return dict(zip(["id", "title", "description", "price", "image"], data))
+
+
+@app.get("/add_to_cart/{product_id}")
+async def add_to_cart(product_id: int, session: str = Cookie(None)):
+    await run_query(add_cart_item, product_id, session=session or "", commit=True)
+    return ""
+
+
+@app.get("/cart")
+async def cart(session: str = Cookie(None)):
+    return await run_query(select_cart, session=session or "")
@@ -0,0 +1,127 @@
+import functools
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, make_response, request
+
+try:
+    import brotli  # pip install brotli (optional, gzip is used without it)
+except ImportError:
+    brotli = None
+
+
+class TTLCache:
+    # A small in-process cache: entries expire after `ttl` seconds, or all at once with invalidate()
+    # Every process (worker) has its own copy, so a write in one worker is seen by the others after `ttl` at most
+    def __init__(self, ttl=60, max_items=1024):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.version = 0  # Goes up on every invalidate(), used in ETags
+        self._items = {}  # key -> (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._items) >= self.max_items:
+                self._items.pop(next(iter(self._items)))  # Oldest first
+            self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self):
+        with self._lock:
+            self._items.clear()
+            self.version += 1
+
+    @property
+    def tag(self):
+        # Changes on every write, and at least once every `ttl` seconds (so ETags can't outlive the cache)
+        return f"{self.version}.{int(time.time() // self.ttl)}"
+
+
+class LRUCache:
+    # Keeps the `max_items` most recently used entries
+    def __init__(self, max_items=10000):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.max_items:
+                self._items.popitem(last=False)  # Least recently used
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+
+catalog_cache = TTLCache(ttl=60)  # Product pages, invalidated by any product write
+user_ids = LRUCache(max_items=10000)  # username -> user id, invalidated by UserCreate.create
+users_cache = TTLCache(ttl=60)  # User pages, invalidated by UserCreate.create
+response_cache = TTLCache(ttl=60, max_items=4096)  # Whole rendered responses, see cached_response
+
+
+class CachedResponse:
+    # A rendered response, compressed once when it's stored (and not on every hit)
+    def __init__(self, response):
+        self.status = response.status_code
+        self.headers = [(key, value) for key, value in response.headers if key != "Content-Length"]
+        self.body = response.get_data()
+        self.gzip = gzip.compress(self.body) if len(self.body) > 500 else None
+        self.brotli = brotli.compress(self.body) if brotli is not None and self.gzip is not None else None
+
+    def to_response(self):
+        if self.brotli is not None and "br" in request.accept_encodings:
+            response = Response(self.brotli, status=self.status, headers=self.headers)
+            response.headers["Content-Encoding"] = "br"
+        elif self.gzip is not None and "gzip" in request.accept_encodings:
+            response = Response(self.gzip, status=self.status, headers=self.headers)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(self.body, status=self.status, headers=self.headers)
+        response.vary.update(["Accept", "Accept-Encoding"])  # The cache key depends on both
+        return response.make_conditional(request)  # 304 if the browser already has this version (ETag)
+
+
+def cached_response(*sources):
+    # Decorator for views that only depend on the URL and on the data behind `sources`
+    # (catalog_cache, users_cache...) - a write to any of them changes its tag, and so the cache key
+    # A hit doesn't touch the database and doesn't render the template
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            is_html = "text/html" in request.headers.get("Accept", "")
+            key = (request.path, request.query_string, is_html, tuple(source.tag for source in sources))
+            cached = response_cache.get(key)
+            if cached is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response  # 304s, errors, redirects... aren't cached
+                if response.get_etag()[0] is None:
+                    response.add_etag()
+                cached = CachedResponse(response)
+                response_cache.set(key, cached)
+            return cached.to_response()
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,11 @@
 import sqlite3
-import httpx
 import json
+import sys
+from pathlib import Path
+from import_catalog import import_file
+from migrate_carts import CREATE_CART_ITEMS, migrate_json_carts
+from models.orders import create_order_tables
+from search_index import create_search_index
 
 
 db = sqlite3.connect("data.db")
@@ -12,7 +17,8 @@ cursor.execute(
             description TEXT,
             price REAL,
             category TEXT,
-            image TEXT
+            image TEXT,
+            stock INTEGER NOT NULL DEFAULT 100
 )"""
 )
 
@@ -24,6 +30,7 @@ cursor.execute(
             password TEXT
 )"""
 )
+cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username)")  # Fast login lookups
 
 cursor.execute("""CREATE TABLE IF NOT EXISTS carts (
                 user_id INTEGER PRIMARY KEY NOT NULL,
@@ -31,49 +38,33 @@ cursor.execute("""CREATE TABLE IF NOT EXISTS carts (
                 purchase_date TEXT
 )""")
 
+cursor.execute(CREATE_CART_ITEMS)
+create_order_tables(db)  # orders, order_items (and products.stock in databases created before it)
 
-url = "https://fakestoreapi.com/products"
-response = httpx.get(url)
-data = response.json()
 
-for product in data:
-    cursor.execute(
-        """INSERT INTO products
-                (id, title, description, price, category, image)
-                VALUES (?, ?, ?, ?, ?, ?)""",
-        [
-            product["id"],
-            product["title"],
-            product["description"],
-            product["price"],
-            product["category"],
-            product["image"],
-        ],
-    )
+# The catalog is loaded from local files, run with --download to refresh them from the fake store API first
+fixtures = Path(__file__).parent / "fixtures"
+if "--download" in sys.argv:
+    import httpx
 
+    for table in ("products", "users"):
+        response = httpx.get(f"https://fakestoreapi.com/{table}")
+        (fixtures / f"{table}.json").write_text(json.dumps(response.json(), indent=2))
 
-response = httpx.get("https://fakestoreapi.com/users")
-data = response.json()
-for user in data:
-    cursor.execute(
-        "INSERT INTO users (id, email, username, password) VALUES (?, ?, ?, ?)",
-        [user["id"], user["email"], user["username"], user["password"]],
-    )
+import_file(db, "products", fixtures / "products.json")
+import_file(db, "users", fixtures / "users.json")
+create_search_index(db)
 
-db.commit()
-
-user_id = 3
 products = {6: 4, 7: 10, 1: 1}
 
 # json.dump(products, file)
 products_json = json.dumps(products)  # "[6, 7, 8, 20]"
 
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [1, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [2, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [3, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [4, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [5, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [6, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [7, products_json])
-cursor.execute("INSERT INTO carts (user_id, products) VALUES (?, ?)", [8, products_json])
+carts = [[user_id, products_json] for user_id in range(1, 9)]
+cursor.executemany(
+    """INSERT INTO carts (user_id, products) VALUES (?, ?)
+    ON CONFLICT (user_id) DO NOTHING""",  # Running this file again doesn't add to the carts
+    carts,
+)
 db.commit()
+migrate_json_carts(db)  # Moves the carts above into cart_items
@@ -1,9 +1,91 @@
 
+import queue
 import sqlite3
+import threading
 from flask import g
 
+DB_PATH = "data.db"
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",  # Readers don't wait for the writer, and the writer doesn't wait for readers
+    "PRAGMA synchronous = NORMAL",  # Safe with WAL, and much fewer fsync calls than FULL
+    "PRAGMA mmap_size = 268435456",  # Read the DB file through a 256 MB memory map
+    "PRAGMA cache_size = -16000",  # 16 MB page cache per connection (negative means KB)
+]
+
+
+class ConnectionPool:
+    # Keeps open connections and hands them out per request, instead of connecting on every request
+    def __init__(self, path=DB_PATH, size=8, timeout=5):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # The most recently used connection is the "warmest" one
+        self._lock = threading.Lock()
+        self.created = 0
+        self.acquired = 0
+        self.reused = 0
+        self.waited = 0
+
+    def _connect(self):
+        # A connection is used by one request at a time, but not always on the thread that created it
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            db.execute(pragma)
+        return db
+
+    def acquire(self):
+        with self._lock:
+            self.acquired += 1
+            if self._idle.empty() and self.created < self.size:
+                self.created += 1
+                return self._connect()
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.waited += 1
+            try:
+                db = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise RuntimeError(f"No free database connection after {self.timeout} seconds") from None
+        with self._lock:
+            self.reused += 1
+        return db
+
+    def release(self, db):
+        if db.in_transaction:
+            db.rollback()  # Don't pass a half done transaction to the next request
+        self._idle.put(db)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+            with self._lock:
+                self.created -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self.created,
+                "idle": self._idle.qsize(),
+                "in_use": self.created - self._idle.qsize(),
+                "acquired": self.acquired,
+                "reused": self.reused,
+                "waited": self.waited,
+            }
+
+
+pool = ConnectionPool()
+
 
 def get_db():
     if "db" not in g:
-        g.db = sqlite3.connect("data.db")
+        g.db = pool.acquire()
     return g.db
+
+
+def close_db(e=None):
+    db = g.pop("db", None)
+    if db is not None:
+        pool.release(db)
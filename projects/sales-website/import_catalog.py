@@ -0,0 +1,131 @@
+# Bulk import products / users from a local file, in batches, inside a single transaction
+# python import_catalog.py fixtures/products.json
+# python import_catalog.py users.csv --table users --batch-size 50000
+# Files can be .json (an array of objects), .ndjson / .jsonl (one object per line) or .csv (with a header row)
+# Rows with an existing id are updated, so running the same import twice doesn't create duplicates
+# Plain text user passwords are hashed on the way in (slow on purpose, PASSWORD_COST=low for big test files)
+import argparse
+import csv
+import itertools
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from passwords import hash_password, is_password_hash
+from search_index import SEARCH_TRIGGERS, create_search_index
+
+TABLE_COLUMNS = {
+    "products": ["id", "title", "description", "price", "category", "image"],
+    "users": ["id", "email", "username", "password"],
+}
+SEPARATORS = re.compile(r"[\s,]*")  # Between the objects of an array
+
+
+def iter_json_array(f, chunk_size=2**16):
+    # Yields the objects of a JSON array one by one, without loading the whole file
+    # The buffer is only cut when it runs out (not after every object), so each character is copied about once
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Expected a JSON array")
+    position = 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, position_after = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            more = f.read(chunk_size)
+            if not more:
+                raise
+            buffer = buffer[position:] + more  # The object continues in the next chunk
+            position = 0
+            continue
+        yield item
+        position = position_after
+
+
+def read_rows(path):
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif path.suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def hash_passwords(rows):
+    # The sales website never checks passwords, so they can't be migrated on login - they're hashed here
+    # A password that is already a hash (an export from another database) is kept as it is
+    for row in rows:
+        password = row.get("password")
+        if password and not is_password_hash(password):
+            row = {**row, "password": hash_password(password)}
+        yield row
+
+
+def empty_to_none(value):
+    return None if value == "" else value  # Empty CSV cells are NULL, not empty strings
+
+
+def import_rows(db, table, rows, batch_size=5000):
+    # Insert (or update, by id) every row, `batch_size` rows per executemany call
+    # Nothing is committed here, the caller decides when the transaction ends
+    columns = TABLE_COLUMNS[table]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+    query = f"""INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+    ON CONFLICT (id) DO UPDATE SET {updates}"""
+    cursor = db.cursor()
+    count = 0
+    for batch in batched(rows, batch_size):
+        cursor.executemany(query, [[empty_to_none(row.get(column)) for column in columns] for row in batch])
+        count += len(batch)
+    return count
+
+
+def import_file(db, table, path, batch_size=5000, defer_search_index=False):
+    # defer_search_index: drop the search triggers during the import and rebuild the index once at the end
+    # (much faster for big imports, slower for small updates to a big catalog)
+    start = time.perf_counter()
+    defer_search_index = defer_search_index and table == "products"
+    if defer_search_index:
+        for trigger in SEARCH_TRIGGERS:
+            db.execute(f"DROP TRIGGER IF EXISTS {trigger}")  # Committed right away (DDL), so undone in finally
+    try:
+        rows = read_rows(path)
+        if table == "users":
+            rows = hash_passwords(rows)
+        count = import_rows(db, table, rows, batch_size)
+        db.commit()
+    except BaseException:
+        db.rollback()  # A failed import changes nothing
+        raise
+    finally:
+        if defer_search_index:
+            create_search_index(db)  # Always put the triggers back, even if the import failed
+    seconds = time.perf_counter() - start
+    print(f"Imported {count:,} {table} from {path} in {seconds:.2f} seconds ({count / max(seconds, 1e-9):,.0f} rows/sec)")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a catalog file into the database")
+    parser.add_argument("path", help="A .json, .ndjson / .jsonl or .csv file")
+    parser.add_argument("--table", choices=list(TABLE_COLUMNS), default="products")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--db", default="data.db")
+    parser.add_argument("--defer-search-index", action="store_true", help="Rebuild the search index once at the end")
+    args = parser.parse_args()
+    import_file(sqlite3.connect(args.db), args.table, args.path, args.batch_size, args.defer_search_index)
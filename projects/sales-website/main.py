@@ -1,15 +1,23 @@
 from flask import Flask, flash, request, render_template, redirect, session
-from db import get_db
+from db import close_db, get_db, pool
+from models.orders import order_processor
+from models.users import find_user_id
+from sessions import ServerSideSessionInterface, SQLiteSessionStore
 from views.users import bp as users_bp
 from views.products import bp as products_bp
 from views.carts import bp as carts_bp
+from views.orders import bp as orders_bp
 
 
 app = Flask(__name__)
 app.secret_key = "MYreallySECRETkey"
+app.session_interface = ServerSideSessionInterface(SQLiteSessionStore("data.db"))  # Or MemorySessionStore()
 app.register_blueprint(users_bp)
 app.register_blueprint(products_bp)
 app.register_blueprint(carts_bp)
+app.register_blueprint(orders_bp)
+app.teardown_appcontext(close_db)  # Return the connection to the pool after each request
+app.before_request(order_processor.start)  # Processes confirmed orders in the background, from the first request on
 
 
 @app.route("/")
@@ -18,10 +26,9 @@ def main_page():
         username = request.args["username"]
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT id FROM users WHERE username = ?", [username])
-        user_id = cursor.fetchone()  # (7,)  # None
+        user_id = find_user_id(cursor, username)  # 7  # None
         if user_id is not None:  # if user_id:
-            user_id = user_id[0]  # 7
+            session.regenerate()  # A new session id for the logged in user
             session["user_id"] = str(user_id)
             return redirect("/products")
         else:
@@ -30,16 +37,23 @@ def main_page():
             flash("Username doesnt want to exist")
             return render_template("login.html")
 
-    if "user_id" in request.cookies:
+    if "user_id" in session:
         return redirect("/products")
     else:
         return render_template("login.html")
 
 
+@app.route("/db_stats")
+def db_stats():
+    return pool.stats()
+
+
 @app.route("/logout")
 def logout():
     session.pop("user_id", None)
+    session.regenerate()
     return redirect("/")
 
 
-app.run(debug=True)
+if __name__ == "__main__":
+    app.run(debug=True)  # Development server, for the multi worker API see asgi.py
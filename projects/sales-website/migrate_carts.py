@@ -0,0 +1,34 @@
+import json
+import sqlite3
+
+CREATE_CART_ITEMS = """CREATE TABLE IF NOT EXISTS cart_items (
+                user_id INTEGER NOT NULL,
+                product_id INTEGER NOT NULL,
+                qty INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (user_id, product_id)
+) WITHOUT ROWID"""
+
+
+def migrate_json_carts(db):
+    # Move the old JSON carts ({"6": 4, "7": 10}) into cart_items, one row per product
+    # Safe to run more than once: migrated carts are cleared, and quantities are added to existing rows
+    cursor = db.cursor()
+    cursor.execute(CREATE_CART_ITEMS)
+    cursor.execute("SELECT user_id, products FROM carts WHERE products IS NOT NULL")
+    items = []
+    for user_id, products_json in cursor.fetchall():
+        for product_id, qty in json.loads(products_json).items():
+            items.append([user_id, int(product_id), qty])
+    cursor.executemany(
+        """INSERT INTO cart_items (user_id, product_id, qty) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, product_id) DO UPDATE SET qty = qty + excluded.qty""",
+        items,
+    )
+    cursor.execute("UPDATE carts SET products = NULL WHERE products IS NOT NULL")
+    db.commit()
+    return len(items)
+
+
+if __name__ == "__main__":
+    db = sqlite3.connect("data.db")
+    print("Migrated", migrate_json_carts(db), "cart items")
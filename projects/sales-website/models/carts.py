@@ -0,0 +1,21 @@
+# Queries shared by the Flask views and the async API (asgi.py), they take a cursor and don't commit
+
+
+def add_cart_item(cursor, user_id, product_id):
+    # A single statement: adds the product, or adds 1 to its qty if it's already in the cart
+    # No read-modify-write, so two clicks at the same time can't overwrite each other
+    cursor.execute(
+        """INSERT INTO cart_items (user_id, product_id, qty) VALUES (?, ?, 1)
+        ON CONFLICT (user_id, product_id) DO UPDATE SET qty = qty + 1""",
+        [user_id, product_id],
+    )
+
+
+def select_cart(cursor, user_id):
+    cursor.execute(
+        """SELECT products.id, products.title, products.price, products.image, cart_items.qty
+        FROM cart_items JOIN products ON products.id = cart_items.product_id
+        WHERE cart_items.user_id = ?""",
+        [user_id],
+    )
+    return cursor.fetchall()
@@ -0,0 +1,170 @@
+import queue
+import sqlite3
+import threading
+import time
+
+CREATE_ORDERS = """CREATE TABLE IF NOT EXISTS orders (
+                id INTEGER PRIMARY KEY NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'confirmed',
+                total REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                processed_at TEXT
+)"""
+CREATE_ORDER_ITEMS = """CREATE TABLE IF NOT EXISTS order_items (
+                order_id INTEGER NOT NULL,
+                product_id INTEGER NOT NULL,
+                qty INTEGER NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (order_id, product_id)
+) WITHOUT ROWID"""
+DEFAULT_STOCK = 100
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Not enough stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+def create_order_tables(db):
+    # Safe to run more than once, also adds the stock column to a products table that was created without it
+    cursor = db.cursor()
+    cursor.execute(CREATE_ORDERS)
+    cursor.execute(CREATE_ORDER_ITEMS)
+    cursor.execute("CREATE INDEX IF NOT EXISTS orders_user_id ON orders (user_id)")
+    cursor.execute("SELECT name FROM pragma_table_info('products')")
+    if "stock" not in [row[0] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE products ADD COLUMN stock INTEGER NOT NULL DEFAULT {DEFAULT_STOCK}")
+    db.commit()
+
+
+def checkout(db, user_id):
+    # Turns the whole cart into an order, in one transaction and with the same few statements for any cart size
+    # Stock is taken by a single conditional UPDATE (only rows with enough stock change), so there is no
+    # read-then-write in Python that two checkouts could interleave. Returns (order_id, total)
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    cursor = db.cursor()
+    cursor.execute("BEGIN IMMEDIATE")  # Take the write lock now, instead of failing to upgrade a read lock later
+    try:
+        cursor.execute("SELECT COUNT(*) FROM cart_items WHERE user_id = ?", [user_id])
+        lines = cursor.fetchone()[0]
+        if lines == 0:
+            raise ValueError("The cart is empty")
+        cursor.execute(
+            """UPDATE products SET stock = products.stock - cart_items.qty
+            FROM cart_items
+            WHERE cart_items.user_id = ? AND cart_items.product_id = products.id AND products.stock >= cart_items.qty""",
+            [user_id],
+        )
+        if cursor.rowcount != lines:  # Some line didn't have enough stock (or its product is gone) - undo it all
+            db.rollback()
+            cursor.execute(
+                """SELECT cart_items.product_id FROM cart_items
+                LEFT JOIN products ON products.id = cart_items.product_id
+                WHERE cart_items.user_id = ? AND (products.stock IS NULL OR products.stock < cart_items.qty)""",
+                [user_id],
+            )
+            raise OutOfStock([row[0] for row in cursor.fetchall()])
+
+        cursor.execute(
+            """INSERT INTO orders (user_id, status, total, created_at)
+            SELECT ?, 'confirmed', SUM(products.price * cart_items.qty), ?
+            FROM cart_items JOIN products ON products.id = cart_items.product_id
+            WHERE cart_items.user_id = ?""",
+            [user_id, now, user_id],
+        )
+        order_id = cursor.lastrowid
+        cursor.execute(
+            """INSERT INTO order_items (order_id, product_id, qty, price)
+            SELECT ?, cart_items.product_id, cart_items.qty, products.price
+            FROM cart_items JOIN products ON products.id = cart_items.product_id
+            WHERE cart_items.user_id = ?""",
+            [order_id, user_id],
+        )
+        cursor.execute("DELETE FROM cart_items WHERE user_id = ?", [user_id])
+        cursor.execute(
+            """INSERT INTO carts (user_id, purchase_date) VALUES (?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET purchase_date = excluded.purchase_date""",
+            [user_id, now],
+        )
+        cursor.execute("SELECT total FROM orders WHERE id = ?", [order_id])
+        total = cursor.fetchone()[0]
+        db.commit()
+    except BaseException:
+        if db.in_transaction:
+            db.rollback()
+        raise
+    return order_id, total
+
+
+class OrderProcessor:
+    # Processes confirmed orders in the background, many orders per transaction
+    # Checkout only puts the order id in the queue, so a flash sale doesn't wait for the processing
+    def __init__(self, path="data.db", batch_size=500, max_wait=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_wait = max_wait  # Seconds to wait for a batch to fill up before processing a partial batch
+        self.queue = queue.Queue()
+        self.processed = 0
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        # Safe to call on every request, only the first call starts the thread
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="order-processor", daemon=True)
+                self._thread.start()
+
+    def submit(self, order_id):
+        self.queue.put(order_id)
+
+    def _next_batch(self):
+        batch = [self.queue.get()]  # Sleep until there is something to do
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # Everything is retried, so the thread never dies - a dead processor would leave every new order in the queue
+        db = None
+        recovered = False
+        while True:
+            batch = []
+            try:
+                if db is None:
+                    db = sqlite3.connect(self.path)
+                    db.execute("PRAGMA journal_mode = WAL")
+                if not recovered:
+                    # Orders that were confirmed but not processed before a restart
+                    # (an order that is also in the queue is processed once, see the WHERE in process)
+                    for (order_id,) in db.execute("SELECT id FROM orders WHERE status = 'confirmed'").fetchall():
+                        self.queue.put(order_id)
+                    recovered = True
+                batch = self._next_batch()
+                self.process(db, batch)
+            except Exception as e:
+                print("Order processing failed, will retry:", e)
+                for order_id in batch:
+                    self.queue.put(order_id)
+                time.sleep(1)
+
+    def process(self, db, order_ids):
+        # Payment, shipping etc. would go here - for now a batch of orders is marked as processed
+        placeholders = ", ".join("?" * len(order_ids))
+        db.execute(
+            f"UPDATE orders SET status = 'processed', processed_at = ? WHERE status = 'confirmed' AND id IN ({placeholders})",
+            [time.strftime("%Y-%m-%d %H:%M:%S"), *order_ids],
+        )
+        db.commit()
+        self.processed += len(order_ids)
+
+
+order_processor = OrderProcessor()
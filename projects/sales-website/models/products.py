@@ -1,3 +1,22 @@
+# Queries shared by the Flask views and the async API (asgi.py), they take a cursor and don't commit
+
+
+def select_products(cursor, after_id, limit):
+    # Keyset pagination: the products after `after_id` (WHERE id > ? uses the primary key,
+    # so a page costs the same no matter how deep it is). Returns (rows, next_after_id or None)
+    cursor.execute(
+        "SELECT id, title, description, price, image FROM products WHERE id > ? ORDER BY id LIMIT ?",
+        [after_id, limit + 1],  # One extra row, only to know if there is a next page
+    )
+    data = cursor.fetchall()  # List of tuples - tuple = row in table
+    next_after_id = data[limit - 1][0] if len(data) > limit else None
+    return data[:limit], next_after_id
+
+
+def select_product(cursor, product_id):
+    cursor.execute("SELECT id, title, description, price, image FROM products WHERE id = ?", [product_id])
+    return cursor.fetchone()
+
 
 class Product:
     def __init__(self, id, title, description, price, image):
@@ -9,13 +28,15 @@ class Product:
 
 
 class ProductCreate:
-    def __init__(self, title, description, price, image):
+    def __init__(self, title, description, price, image, category=None):
         self.title = title
         self.description = description
         self.price = price
         self.image = image
+        self.category = category
 
     def create(self, cursor):
-        params = [self.title, self.description, self.price, self.image]
-        cursor.execute("""INSERT INTO products (title, description, price, image)
-                       VALUES (?, ?, ?, ?)""", params)
\ No newline at end of file
+        params = [self.title, self.description, self.price, self.image, self.category]
+        cursor.execute("""INSERT INTO products (title, description, price, image, category)
+                       VALUES (?, ?, ?, ?, ?)""", params)
+        # catalog_cache is invalidated by the caller after committing, so no request can cache the old list in between
@@ -1,3 +1,6 @@
+from cache import user_ids
+from passwords import hash_password
+
 
 class User:
     def __init__(self, id, username, email):
@@ -13,7 +16,22 @@ class UserCreate:
         self.email = email
 
     def create(self, cursor):
-        params = [self.username, self.password, self.email]
+        params = [self.username, hash_password(self.password), self.email]
         cursor.execute(
             "INSERT INTO users (username, password, email) VALUES (?, ?, ?)", params
-        )
\ No newline at end of file
+        )
+        user_ids.invalidate(self.username)
+        # users_cache is invalidated by the caller after committing, so no request can cache the old list in between
+
+
+def find_user_id(cursor, username):
+    # Only existing users are cached - a missing username might be registered later (maybe by another worker)
+    user_id = user_ids.get(username)
+    if user_id is None:
+        cursor.execute("SELECT id FROM users WHERE username = ?", [username])
+        row = cursor.fetchone()  # (7,)  # None
+        if row is None:
+            return None
+        user_id = row[0]
+        user_ids.set(username, user_id)
+    return user_id
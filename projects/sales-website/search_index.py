@@ -0,0 +1,50 @@
+import sqlite3
+
+# Full text index over the products table (FTS5, built into SQLite)
+# content='products' means the text isn't stored twice, the index reads it from the products table
+# The triggers keep the index in sync with every INSERT / DELETE on products, and every UPDATE of an indexed column
+CREATE_SEARCH_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    title,
+    description,
+    category,
+    content='products',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, title, description, category)
+    VALUES (new.id, new.title, new.description, new.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, title, description, category)
+    VALUES ('delete', old.id, old.title, old.description, old.category);
+END;
+
+-- Only the indexed columns: a stock or price update doesn't touch the index
+-- (dropped first, so databases that have the older AFTER UPDATE ON products trigger get this one)
+DROP TRIGGER IF EXISTS products_fts_update;
+CREATE TRIGGER products_fts_update AFTER UPDATE OF title, description, category ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, title, description, category)
+    VALUES ('delete', old.id, old.title, old.description, old.category);
+    INSERT INTO products_fts (rowid, title, description, category)
+    VALUES (new.id, new.title, new.description, new.category);
+END;
+"""
+SEARCH_TRIGGERS = ["products_fts_insert", "products_fts_delete", "products_fts_update"]
+
+
+def create_search_index(db):
+    # Creates the index (if needed) and fills it with the products that are already in the table
+    cursor = db.cursor()
+    cursor.executescript(CREATE_SEARCH_INDEX)
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    db.commit()
+
+
+if __name__ == "__main__":
+    db = sqlite3.connect("data.db")
+    create_search_index(db)
+    print("Search index created")
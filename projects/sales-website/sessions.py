@@ -0,0 +1,126 @@
+import secrets
+import sqlite3
+import threading
+import time
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Server side sessions: the cookie only holds a random session id, the data itself stays on the server
+# The data is only written when the session changes, not re-signed and re-sent with every response
+# Pick a store: MemorySessionStore (one process, lost on restart) or SQLiteSessionStore (shared by all workers)
+serializer = TaggedJSONSerializer()  # Same format Flask uses for its cookies (handles tuples, bytes, dates...)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.old_sid = None  # Deleted from the store on save, see regenerate
+
+    def regenerate(self):
+        # Move the data to a new random id - call it on login and logout, so an id that someone else
+        # knew (or planted in the browser) before the login is worthless after it (session fixation)
+        if self.old_sid is None and not self.new:
+            self.old_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class MemorySessionStore:
+    def __init__(self):
+        self._sessions = {}  # sid -> (expires, data)
+
+    def get(self, sid):
+        item = self._sessions.get(sid)
+        if item is None or item[0] < time.time():
+            return None
+        return item[1]
+
+    def set(self, sid, data, expires):
+        self._sessions[sid] = (expires, data)
+
+    def delete(self, sid):
+        self._sessions.pop(sid, None)
+
+
+class SQLiteSessionStore:
+    def __init__(self, path="data.db"):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self.db.commit()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, sid):
+        with self._lock:
+            row = self.db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires > ?", [sid, time.time()]
+            ).fetchone()
+        return None if row is None else serializer.loads(row[0])
+
+    def set(self, sid, data, expires):
+        with self._lock:
+            self.db.execute(
+                """INSERT INTO sessions (id, data, expires) VALUES (?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires = excluded.expires""",
+                [sid, serializer.dumps(data), expires],
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.db.execute("DELETE FROM sessions WHERE expires < ?", [time.time()])  # Clean up once in a while
+            self.db.commit()
+
+    def delete(self, sid):
+        with self._lock:
+            self.db.execute("DELETE FROM sessions WHERE id = ?", [sid])
+            self.db.commit()
+
+
+class ServerSideSessionInterface(SessionInterface):
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.old_sid is not None:
+            self.store.delete(session.old_sid)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified and not session.new:
+            return  # Nothing changed, no need to write anything
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, dict(session), time.time() + lifetime)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -1,31 +1,28 @@
-from flask import Blueprint, session
+from flask import Blueprint, abort, make_response, session
 from db import get_db
-import json
+from models.carts import add_cart_item, select_cart
 
 bp = Blueprint("carts", __name__)
 
 @bp.route("/add_to_cart/<product_id>")
 def add_to_cart(product_id):
     # user_id = request.cookies["user_id"]
-    user_id = session["user_id"]
+    user_id = session.get("user_id")
+    if user_id is None:
+        abort(401)  # Not logged in
     db = get_db()
     cursor = db.cursor()
-
-    cursor.execute("SELECT products FROM carts WHERE user_id = ?", [user_id])
-    old_value = cursor.fetchone()  # ('5',)
-    old_value_dict = json.loads(old_value[0])  # 5
-
-    if product_id in old_value_dict:
-        old_value_dict[product_id] = old_value_dict[product_id] + 1
-    else:
-        old_value_dict[product_id] = 1
-    new_value = json.dumps(old_value_dict)
-    params = [new_value, user_id]
-
-    query = """
-UPDATE carts set products = ?
-WHERE user_id = ?
-"""
-    cursor.execute(query, params)
+    add_cart_item(cursor, user_id, product_id)
     db.commit()
     return ""
+
+
+@bp.route("/cart")
+def cart():
+    user_id = session.get("user_id")
+    if user_id is None:
+        abort(401)
+    db = get_db()
+    cursor = db.cursor()
+    data = select_cart(cursor, user_id)
+    return make_response(data)
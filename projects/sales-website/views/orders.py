@@ -0,0 +1,36 @@
+from flask import Blueprint, abort, make_response, session
+from db import get_db
+from models.orders import OutOfStock, checkout, order_processor
+
+bp = Blueprint("orders", __name__)
+
+
+@bp.route("/checkout", methods=["POST"])
+def checkout_cart():
+    user_id = session.get("user_id")
+    if user_id is None:
+        abort(401)  # Not logged in
+    db = get_db()
+    try:
+        order_id, total = checkout(db, user_id)
+    except ValueError as e:
+        return make_response({"error": str(e)}, 400)
+    except OutOfStock as e:
+        return make_response({"error": "Not enough stock", "products": e.product_ids}, 409)
+    order_processor.submit(order_id)
+    return make_response({"order_id": order_id, "total": total, "status": "confirmed"}, 201)
+
+
+@bp.route("/orders")
+def order_list():
+    user_id = session.get("user_id")
+    if user_id is None:
+        abort(401)
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        "SELECT id, status, total, created_at, processed_at FROM orders WHERE user_id = ? ORDER BY id DESC",
+        [user_id],
+    )
+    data = cursor.fetchall()
+    return make_response(data)
@@ -1,14 +1,23 @@
+import re
 from flask import make_response, render_template, Blueprint, request
+from cache import cached_response, catalog_cache
 from db import get_db
-from models.products import Product
+from models.products import Product, ProductCreate, select_product, select_products
 
 bp = Blueprint("products", __name__)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
 
-@bp.route("/products/create")
+@bp.route("/products/create", methods=["GET", "POST"])
 def product_create_form():
     db = get_db()
     cursor = db.cursor()
+    if request.method == "POST":
+        ProductCreate(**request.form).create(cursor)
+        db.commit()
+        catalog_cache.invalidate()
+        return "PRODUCT CREATED"
     cursor.execute("SELECT DISTINCT category FROM products")
     data = cursor.fetchall()
     # categories = [row[0] for row in data]
@@ -16,18 +25,79 @@ def product_create_form():
 
 
 @bp.route("/products")
+@cached_response(catalog_cache)
 def product_list():
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT id, title, description, price, image FROM products")
-    data = cursor.fetchall()  # List of tuples - tuple = row in table
-    if "text/html" in request.headers.get("Accept", ""):
+    # Keyset pagination: /products?after_id=50&limit=50 continues from the last id of the previous page
+    # (see models.products.select_products)
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    is_html = "text/html" in request.headers.get("Accept", "")
+
+    # The ETag only depends on the cache version, so a matching If-None-Match is answered without the DB
+    etag = f"products-{catalog_cache.tag}-{after_id}-{limit}-{'html' if is_html else 'json'}"
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+        response.vary.add("Accept")
+        return response
+
+    page = catalog_cache.get(("products", after_id, limit))
+    if page is None:
+        db = get_db()
+        cursor = db.cursor()
+        page = select_products(cursor, after_id, limit)
+        catalog_cache.set(("products", after_id, limit), page)
+    data, next_after_id = page
+    if is_html:
         product_list = [Product(*item) for item in data]
-        return render_template("product-list.html", products=product_list)
+        response = make_response(
+            render_template("product-list.html", products=product_list, next_after_id=next_after_id, limit=limit)
+        )
     else:
         response = make_response(data)
         response.headers.add("Access-Control-Allow-Origin", "*")
-        return response
+        if next_after_id is not None:
+            response.headers.add("Link", f'</products?after_id={next_after_id}&limit={limit}>; rel="next"')
+    response.set_etag(etag)
+    response.vary.add("Accept")  # HTML or JSON (with different ETags) depending on the Accept header
+    return response
+
+
+@bp.route("/products/search")
+def product_search():
+    # /products/search?q=mens cotton&category=men's clothing&limit=20
+    # Every word is matched as a prefix ("cott" finds "cotton"), results are ranked by bm25 (best first)
+    words = re.findall(r"\w+", request.args.get("q", ""))
+    limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    category = request.args.get("category")
+    if not words:
+        return {"results": [], "facets": {}}
+    match = " ".join(f'"{word}"*' for word in words)  # Quoted, so user input can't break the FTS5 syntax
+
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        """SELECT products.category, COUNT(*) FROM products_fts
+        JOIN products ON products.id = products_fts.rowid
+        WHERE products_fts MATCH ?
+        GROUP BY products.category ORDER BY COUNT(*) DESC""",
+        [match],
+    )
+    facets = dict(cursor.fetchall())
+    cursor.execute(
+        """SELECT products.id, products.title, products.price, products.image, products.category,
+        snippet(products_fts, -1, '<b>', '</b>', '...', 12), bm25(products_fts)
+        FROM products_fts
+        JOIN products ON products.id = products_fts.rowid
+        WHERE products_fts MATCH ? AND (? IS NULL OR products.category = ?)
+        ORDER BY bm25(products_fts) LIMIT ?""",
+        [match, category, category, limit],
+    )
+    columns = ["id", "title", "price", "image", "category", "snippet", "rank"]
+    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    response = make_response({"results": results, "facets": facets})
+    response.headers.add("Access-Control-Allow-Origin", "*")
+    return response
 
 
 @bp.route("/products/delete/<product_id>")
@@ -37,20 +107,18 @@ def delete_product(product_id):
     cursor.execute("DELETE FROM products WHERE id = ?", [product_id])
     if cursor.rowcount == 1:
         db.commit()
+        catalog_cache.invalidate()
         return ("", 200)
     if cursor.rowcount == 0:
         return ("", 404)
 
 
 @bp.route("/products/<product_id>")
+@cached_response(catalog_cache)
 def product_page(product_id):
     db = get_db()
     cursor = db.cursor()
-    cursor.execute(
-        "SELECT id, title, description, price, image FROM products WHERE id = ?",
-        [product_id],
-    )
-    data = cursor.fetchone()
+    data = select_product(cursor, product_id)
     if data:
         return render_template("product.html", product=Product(*data))
     else:
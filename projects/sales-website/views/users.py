@@ -1,4 +1,5 @@
 from flask import request, render_template, Blueprint
+from cache import cached_response, users_cache
 from db import get_db
 from models.users import User, UserCreate
 bp = Blueprint("users", __name__)
@@ -12,11 +13,13 @@ def user_create_form():
         cursor = db.cursor()
         UserCreate(**request.form).create(cursor)
         db.commit()
+        users_cache.invalidate()
         return "USER CREATED"
     return render_template("user-create.html")
 
 
 @bp.route("/users/<user_id>")
+@cached_response(users_cache)
 def user_page(user_id):
     db = get_db()
     cursor = db.cursor()
@@ -32,6 +35,7 @@ def user_page(user_id):
 
 
 @bp.route("/users")
+@cached_response(users_cache)
 def user_list():
     db = get_db()
     cursor = db.cursor()